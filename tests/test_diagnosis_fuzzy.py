@@ -0,0 +1,33 @@
+import pytest
+from utils.diagnosis_search import DiagnosisIndex, alias_key
+
+CATALOGUE = ["Croup", "Crohn's disease", "Acute bronchiolitis", "Otitis media", "Diabetic ketoacidosis", "Asthma"]
+ALIASES = [("RSV", "Acute bronchiolitis"), ("AOM", "Otitis media"), ("J05.0", "Croup"), ("DKA", "Diabetic ketoacidosis"),
+           ("Unknown", "Not in the catalogue")]
+
+@pytest.fixture
+def index():
+    return DiagnosisIndex(CATALOGUE, ALIASES)
+
+def test_alias_keys_ignore_case_spacing_and_dots():
+    assert alias_key(" J05.0 ") == alias_key("j050")
+
+def test_aliases_rank_right_after_an_exact_match(index):
+    assert index.search("rsv") == ["Acute bronchiolitis"]
+    assert index.search("j050") == ["Croup"]
+    assert index.search("Otitis media")[0] == "Otitis media"
+
+def test_aliases_for_unknown_diagnoses_are_ignored(index):
+    assert index.search("unknown") == []
+
+def test_misspellings_are_corrected(index):
+    assert index.search("bronchiolitus") == ["Acute bronchiolitis"]
+    assert index.search("diabetc ketoacidossis") == ["Diabetic ketoacidosis"]
+
+def test_no_fuzzy_guess_when_the_query_matched(index):
+    assert index.search("croup") == ["Croup"]
+
+def test_no_fuzzy_guess_when_the_match_is_excluded(index):
+    # Croup is already chosen, so nothing is left; "Crohn's disease" is not a misspelling of it
+    assert index.search("croup", exclude=["Croup"]) == []
+    assert index.search("rsv", exclude=["Acute bronchiolitis"]) == []
@@ -0,0 +1,47 @@
+import pytest
+from utils.diagnosis_search import DiagnosisIndex
+
+CATALOGUE = [
+    "Croup",
+    "Acute bronchiolitis",
+    "Asthma",
+    "Status asthmaticus",
+    "Acute otitis media",
+    "Otitis media with effusion",
+    "Acute upper respiratory infection",
+    "Pneumonia",
+    "Viral pneumonia",
+    "Crohn's disease",
+]
+
+@pytest.fixture
+def index():
+    return DiagnosisIndex(CATALOGUE + ["  croup ", "ASTHMA"])  # Duplicates ignoring case and spacing
+
+def test_duplicates_are_dropped(index):
+    assert len(index) == len(CATALOGUE)
+    assert "croup" in index and "  Asthma " in index and "Measles" not in index
+
+def test_tiers_rank_exact_then_prefix_then_words_then_substring(index):
+    # "Pneumonia" is exact, "Viral pneumonia" only matches by word
+    assert index.search("pneumonia") == ["Pneumonia", "Viral pneumonia"]
+    # Prefix of the whole name before a prefix of one of its words
+    assert index.search("otitis") == ["Otitis media with effusion", "Acute otitis media"]
+    # Every query word has to prefix a word of the name
+    assert index.search("acu med") == ["Acute otitis media"]
+    # Substrings inside words come last
+    assert index.search("sthma") == ["Asthma", "Status asthmaticus"]
+
+def test_shorter_names_rank_first_within_a_tier(index):
+    assert index.search("acute") == ["Acute otitis media", "Acute bronchiolitis", "Acute upper respiratory infection"]
+    # One letter: name prefixes, then word prefixes, then any name containing it
+    assert index.search("a")[:5] == ["Asthma", "Acute otitis media", "Acute bronchiolitis", "Acute upper respiratory infection", "Status asthmaticus"]
+    assert index.search("a", limit=None)[5:] == ["Pneumonia", "Crohn's disease", "Viral pneumonia", "Otitis media with effusion"]
+
+def test_limit_and_exclude(index):
+    assert index.search("acute", limit=1) == ["Acute otitis media"]
+    assert index.search("acute", exclude=["acute otitis  media", ""]) == ["Acute bronchiolitis", "Acute upper respiratory infection"]
+    assert len(index.search("a", limit=None)) == len(index.search("a", limit=100))
+
+def test_blank_query_matches_nothing(index):
+    assert index.search("   ") == []
@@ -0,0 +1,58 @@
+import json
+from streamlit.testing.v1 import AppTest
+
+def page():
+    import streamlit as st
+    from utils.diagnosis_sidebar import diagnosis_sidebar
+    from utils.matrix_assessment import matrix_assessment
+
+    st.session_state.setdefault("diagnoses", ["Asthma", "Croup", "Pneumonia"])
+    st.session_state["page_runs"] = st.session_state.get("page_runs", 0) + 1
+    diagnosis_sidebar("diagnoses_s3")
+    matrix_assessment("tests", "Tests", st.session_state.diagnoses, ["", "Necessary"])
+
+def grid_headers(at):
+    def find(node):
+        for child in getattr(node, "children", {}).values():
+            if child.type == "dataframe":
+                return child
+            found = find(child)
+            if found:
+                return found
+    columns = json.loads(find(at.main).proto.columns)
+    return [columns[f"dx_{j}"]["label"] for j in range(len(at.session_state["diagnoses"]))]
+
+def test_reordering_reruns_the_grid_but_not_the_page():
+    at = AppTest.from_function(page).run()
+    at.sidebar.selectbox(key="move_diagnosis").select("Croup").run()
+    page_runs = at.session_state["page_runs"]
+
+    at.sidebar.button[0].click().run()  # Adjust Priority, "Higher Priority" is the default
+
+    assert not at.exception
+    assert at.session_state["diagnoses"] == ["Croup", "Asthma", "Pneumonia"]
+    assert at.session_state["diagnoses_s3"] == ["Croup", "Asthma", "Pneumonia"]
+    assert grid_headers(at) == ["Croup", "Asthma", "Pneumonia"]
+    assert at.session_state["page_runs"] == page_runs
+
+def test_moving_past_the_end_changes_nothing():
+    at = AppTest.from_function(page).run()
+    at.sidebar.radio(key="move_direction").set_value("Lower Priority").run()
+    at.sidebar.selectbox(key="move_diagnosis").select("Pneumonia").run()
+
+    at.sidebar.button[0].click().run()
+
+    assert at.session_state["diagnoses"] == ["Asthma", "Croup", "Pneumonia"]
+    assert "diagnoses_s3" not in at.session_state
+
+def test_changing_a_diagnosis_renames_its_column():
+    at = AppTest.from_function(page).run()
+    at.sidebar.selectbox(key="change_diagnosis").select("Croup").run()
+    at.sidebar.text_input(key="new_diagnosis_search").input("bronch").run()
+    option = next(button for button in at.sidebar.button if button.key and button.key.startswith("select_new_"))
+
+    option.click().run()
+
+    assert not at.exception
+    assert at.session_state["diagnoses"][1] == option.label
+    assert grid_headers(at)[1] == option.label
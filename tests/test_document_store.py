@@ -0,0 +1,83 @@
+import copy
+import pytest
+import streamlit as st
+from utils import firebase_operations
+from utils.document_store import SQLiteStore, changed_fields, merge_entry
+
+DOCUMENT = {
+    "last_page": "Laboratory Tests",
+    "vs_data": {"heart_rate": True, "blood_pressure": False},
+    "laboratory_tests": {"Asthma": ["Necessary", ""], "Croup": ["", "Unnecessary"]},
+    "diagnoses_s1": ["Asthma", "Croup"],
+}
+
+def test_unchanged_entry_is_empty():
+    assert changed_fields(DOCUMENT, {"last_page": "Laboratory Tests", "vs_data": {"heart_rate": True}}) == {}
+
+def test_changed_scalar_is_kept():
+    assert changed_fields(DOCUMENT, {"last_page": "Results", "diagnoses_s1": ["Asthma", "Croup"]}) == {"last_page": "Results"}
+
+def test_nested_maps_keep_only_changed_leaves():
+    entry = {
+        "vs_data": {"heart_rate": True, "blood_pressure": True},
+        "laboratory_tests": {"Asthma": ["Necessary", ""], "Croup": ["Necessary", "Unnecessary"]},
+    }
+    assert changed_fields(DOCUMENT, entry) == {
+        "vs_data": {"blood_pressure": True},
+        "laboratory_tests": {"Croup": ["Necessary", "Unnecessary"]},
+    }
+
+def test_lists_are_sent_whole():
+    assert changed_fields(DOCUMENT, {"diagnoses_s1": ["Croup", "Asthma"]}) == {"diagnoses_s1": ["Croup", "Asthma"]}
+
+def test_new_and_removed_fields():
+    # Fields missing from the document are new; fields missing from the entry are left alone by a merge
+    assert changed_fields(DOCUMENT, {"vs_data": {"pulseox": False}, "hxfeatures": {}}) == {
+        "vs_data": {"pulseox": False},
+        "hxfeatures": {},
+    }
+    assert changed_fields(DOCUMENT, {}) == {}
+
+@pytest.mark.parametrize("entry", [
+    {"last_page": "Results"},
+    {"vs_data": {"heart_rate": False, "weight": True}},
+    {"laboratory_tests": {"Asthma": ["", ""]}, "diagnoses_s1": ["Croup"]},
+])
+def test_merging_the_changes_matches_merging_the_entry(entry):
+    expected = merge_entry(copy.deepcopy(DOCUMENT), copy.deepcopy(entry))
+    assert merge_entry(copy.deepcopy(DOCUMENT), changed_fields(DOCUMENT, entry)) == expected
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(firebase_operations, "FIREBASE_COLLECTION_NAME", "students")
+    monkeypatch.setattr(firebase_operations, "WRITE_JOURNAL", "")
+    monkeypatch.setattr(firebase_operations, "_start_writer", lambda: None)  # Flush by hand only
+    st.session_state.clear()
+    store = SQLiteStore()
+    store.set("students", "S", DOCUMENT)
+    firebase_operations.get_document(store, "S")  # The session's copy that uploads are diffed against
+    yield store
+    st.session_state.clear()
+
+def test_noop_upload_resolves_immediately(store, monkeypatch):
+    writes = []
+    monkeypatch.setattr(store, "set_many", writes.append)
+
+    future = firebase_operations.upload_to_firebase(store, "S", {"last_page": "Laboratory Tests"})
+
+    assert future.done()
+    assert firebase_operations.upload_status("S") == "saved"
+    firebase_operations.flush(store)
+    assert writes == []
+
+def test_upload_sends_only_changed_leaves(store, monkeypatch):
+    sent = []
+    set_many = store.set_many
+    monkeypatch.setattr(store, "set_many", lambda writes, replace=None: (sent.extend(writes), set_many(writes, replace)))
+
+    future = firebase_operations.upload_to_firebase(store, "S", {**DOCUMENT, "vs_data": {"heart_rate": False}})
+    firebase_operations.flush(store)
+
+    assert future.result(timeout=5)
+    assert [entry for _, entry in sent] == [{"vs_data": {"heart_rate": False}}]
+    assert store.get("students", "S")["vs_data"] == {"heart_rate": False, "blood_pressure": False}
@@ -0,0 +1,90 @@
+import pytest
+import streamlit as st
+from utils import firebase_operations
+from utils.document_store import SQLiteStore
+from utils.matrix_assessment import (
+    MATRIX_FORMAT, decode_matrix, encode_matrix, is_compact, load_matrix, matrix_from_entries, matrix_to_entries,
+)
+
+OPTIONS = ["", "Necessary", "Neither More Nor Less Useful", "Unnecessary"]
+DIAGNOSES = ["Asthma", "Croup"]
+MATRIX = {
+    "rows": ["Complete Blood Count", "Chest X-ray", "", "", ""],
+    "values": {
+        "Asthma": ["Necessary", "Unnecessary", "", "", ""],
+        "Croup": ["", "Neither More Nor Less Useful", "", "", ""],
+    },
+}
+
+def legacy(matrix=MATRIX, diagnoses=DIAGNOSES):
+    return matrix_to_entries(matrix, diagnoses, 'laboratory_test', 'assessment')
+
+def test_encoding_stores_labels_once_and_cells_as_codes():
+    stored = encode_matrix(MATRIX, DIAGNOSES, OPTIONS)
+
+    assert stored == {
+        "format": MATRIX_FORMAT,
+        "rows": MATRIX["rows"],
+        "diagnoses": DIAGNOSES,
+        "options": OPTIONS[1:],
+        "codes": [1, 3, 0, 0, 0, 0, 2, 0, 0, 0],
+    }
+    assert all(not isinstance(code, list) for code in stored["codes"])  # Firestore rejects nested arrays
+
+def test_legacy_to_compact_round_trip():
+    matrix = load_matrix(legacy(), 'laboratory_test', 'assessment')
+    assert decode_matrix(encode_matrix(matrix, DIAGNOSES, OPTIONS)) == matrix == MATRIX
+
+def test_compact_to_legacy_round_trip():
+    stored = encode_matrix(MATRIX, DIAGNOSES, OPTIONS)
+    matrix = load_matrix(stored, 'laboratory_test', 'assessment')
+    assert matrix_to_entries(matrix, stored["diagnoses"], 'laboratory_test', 'assessment') == legacy()
+
+def test_legacy_documents_still_load():
+    assert not is_compact(legacy())
+    assert load_matrix(legacy(), 'laboratory_test', 'assessment') == matrix_from_entries(legacy(), 'laboratory_test', 'assessment')
+    assert load_matrix(None, 'laboratory_test', 'assessment')["rows"] == [""] * 5
+
+def test_diagnosis_order_change_keeps_each_column():
+    stored = encode_matrix(MATRIX, ["Croup", "Asthma"], OPTIONS)
+
+    assert stored["diagnoses"] == ["Croup", "Asthma"]
+    assert stored["codes"][:5] == [0, 2, 0, 0, 0]
+    assert decode_matrix(stored)["values"] == MATRIX["values"]
+
+def test_unknown_codes_and_options_read_as_blank():
+    stored = encode_matrix({"rows": ["A"], "values": {"Asthma": ["Retired option"]}}, ["Asthma"], OPTIONS)
+    assert stored["codes"] == [0]
+    assert decode_matrix({**stored, "codes": [9]})["values"] == {"Asthma": [""]}
+
+def test_mixed_map_reads_the_compact_form():
+    # What merging a compact matrix into a legacy map used to leave behind
+    mixed = {**legacy(), **encode_matrix(MATRIX, ["Croup"], OPTIONS)}
+    assert load_matrix(mixed, 'laboratory_test', 'assessment') == decode_matrix(encode_matrix(MATRIX, ["Croup"], OPTIONS))
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(firebase_operations, "FIREBASE_COLLECTION_NAME", "students")
+    monkeypatch.setattr(firebase_operations, "WRITE_JOURNAL", "")
+    monkeypatch.setattr(firebase_operations, "_start_writer", lambda: None)  # Flush by hand only
+    st.session_state.clear()
+    yield SQLiteStore()
+    st.session_state.clear()
+
+def test_upload_replaces_a_legacy_map(store):
+    store.set("students", "S", {"laboratory_tests": legacy(), "diagnoses_s4": DIAGNOSES})
+    firebase_operations.get_student(store, "S")
+
+    compact = encode_matrix(MATRIX, DIAGNOSES, OPTIONS)
+    firebase_operations.upload_to_firebase(store, "S", {"laboratory_tests": compact}, replace=["laboratory_tests"])
+    firebase_operations.flush(store)
+
+    document = store.get("students", "S")
+    assert document["laboratory_tests"] == compact
+    assert document["diagnoses_s4"] == DIAGNOSES
+    assert firebase_operations.get_student(store, "S").laboratory_tests == compact
+
+def test_merge_without_replace_keeps_legacy_keys(store):
+    store.set("students", "S", {"laboratory_tests": legacy()})
+    store.set("students", "S", {"laboratory_tests": encode_matrix(MATRIX, DIAGNOSES, OPTIONS)})
+    assert set(DIAGNOSES) <= set(store.get("students", "S")["laboratory_tests"])
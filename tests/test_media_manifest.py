@@ -0,0 +1,56 @@
+import os
+import pytest
+from utils import media_manifest
+from utils.media_manifest import MediaManifest, get_media_manifest
+
+@pytest.fixture
+def case_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_manifest, "CHECK_INTERVAL", 0)  # Rescan on every call
+    monkeypatch.setattr(media_manifest, "_manifest", None)
+    for name in ("image_1.png", "image_1.jpg", "audio_1.mp3", "video_1.mp4", "notes.txt"):
+        (tmp_path / name).write_bytes(b"x" * 10)
+    return str(tmp_path)
+
+def touch(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_preferred_extension_wins_and_other_files_are_ignored(case_dir):
+    manifest = MediaManifest(case_dir)
+
+    assert sorted(manifest.assets) == [("audio_1", "audio"), ("image_1", "image"), ("video_1", "video")]
+    assert manifest.get("image_1", "image").path.endswith("image_1.png")
+    assert manifest.get("video_1", "video").mime_type == "video/mp4"
+
+def test_building_reads_no_file(case_dir, monkeypatch):
+    def no_open(*args, **kwargs):
+        raise AssertionError("media files must not be read")
+    monkeypatch.setattr("builtins.open", no_open)
+
+    assert MediaManifest(case_dir).get("video_1", "video").size == 10
+
+def test_version_follows_size_and_mtime(case_dir):
+    path = os.path.join(case_dir, "video_1.mp4")
+    touch(path, 1_000_000_000)
+    before = MediaManifest(case_dir).get("video_1", "video").version
+
+    touch(path, 2_000_000_000)
+    assert MediaManifest(case_dir).get("video_1", "video").version != before
+
+def test_non_media_files_do_not_rebuild_the_manifest(case_dir):
+    manifest = get_media_manifest(case_dir)
+
+    with open(os.path.join(case_dir, ".case_bundle.json"), "w") as file:
+        file.write("{}")
+    os.mkdir(os.path.join(case_dir, ".media_cache"))
+
+    assert get_media_manifest(case_dir) is manifest
+
+def test_media_changes_rebuild_the_manifest(case_dir):
+    manifest = get_media_manifest(case_dir)
+
+    touch(os.path.join(case_dir, "audio_1.mp3"), 3_000_000_000)
+    changed = get_media_manifest(case_dir)
+    assert changed is not manifest
+
+    os.remove(os.path.join(case_dir, "image_1.png"))
+    assert get_media_manifest(case_dir).get("image_1", "image").path.endswith("image_1.jpg")
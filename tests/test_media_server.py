@@ -0,0 +1,94 @@
+import threading
+import http.client
+import pytest
+from http.server import ThreadingHTTPServer
+from utils import media_server
+from utils.media_manifest import MediaManifest
+from utils.media_server import MediaRequestHandler, media_url, parse_range
+
+BODY = bytes(range(256)) * 4  # 1024 bytes
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 1023)),
+    ("bytes=-100", (924, 1023)),
+    ("bytes=-5000", (0, 1023)),  # A suffix longer than the file is the whole file
+    ("bytes=1000-5000", (1000, 1023)),  # The end is clamped to the last byte
+    (" bytes=5-5 ", (5, 5)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, len(BODY)) == expected
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1024-", 1024),  # Starts past the end
+    ("bytes=10-5", 1024),
+    ("bytes=-0", 1024),
+    ("bytes=-", 1024),
+    ("bytes=0-1,5-9", 1024),  # Multiple ranges are not supported
+    ("items=0-9", 1024),
+    ("bytes=0-9", 0),  # Nothing to send from an empty file
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    (tmp_path / "audio_1.mp3").write_bytes(BODY)
+    manifest = MediaManifest(str(tmp_path))
+    monkeypatch.setattr(media_server, "get_media_manifest", lambda: manifest)
+    monkeypatch.setattr(media_server, "MEDIA_BASE_URL", "")
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MediaRequestHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd, manifest.get("audio_1", "audio")
+    httpd.shutdown()
+    httpd.server_close()
+
+def request(httpd, path, **headers):
+    connection = http.client.HTTPConnection(*httpd.server_address, timeout=5)
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+def test_whole_file(server):
+    httpd, asset = server
+    response, body = request(httpd, media_url(asset))
+
+    assert response.status == 200
+    assert body == BODY
+    assert response.getheader("Accept-Ranges") == "bytes"
+    assert response.getheader("Content-Type") == "audio/mpeg"
+
+def test_range_returns_206(server):
+    httpd, asset = server
+    response, body = request(httpd, media_url(asset), Range="bytes=100-199")
+
+    assert response.status == 206
+    assert response.getheader("Content-Range") == "bytes 100-199/1024"
+    assert body == BODY[100:200]
+
+def test_unsatisfiable_range_returns_416(server):
+    httpd, asset = server
+    response, body = request(httpd, media_url(asset), Range="bytes=2000-")
+
+    assert response.status == 416
+    assert response.getheader("Content-Range") == "bytes */1024"
+    assert body == b""
+
+def test_matching_etag_returns_304(server):
+    httpd, asset = server
+    response, _ = request(httpd, media_url(asset))
+    response, body = request(httpd, media_url(asset), **{"If-None-Match": response.getheader("ETag")})
+
+    assert response.status == 304
+    assert body == b""
+
+def test_stale_version_and_unknown_paths_are_404(server):
+    httpd, asset = server
+    assert request(httpd, "/media/0-0/audio_1.mp3")[0].status == 404
+    assert request(httpd, "/tiles/x/../../audio_1.mp3")[0].status == 404
+    assert request(httpd, "/other")[0].status == 404
@@ -0,0 +1,77 @@
+import csv
+import pytest
+from utils import firebase_operations, provision
+from utils.document_store import SQLiteStore
+from utils.firebase_operations import MAX_BATCH_SIZE
+from utils.provision import CODE_ALPHABET, CODE_LENGTH, assign_codes, main, write_documents
+
+class RecordingStore(SQLiteStore):
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+
+    def set_many(self, writes, replace=None):
+        self.batch_sizes.append(len(writes))
+        super().set_many(writes, replace)
+
+def students(count):
+    return [(f"C{i:04}", f"Student {i}") for i in range(count)]
+
+def test_codes_are_assigned_only_where_missing():
+    assigned = assign_codes([("KEEP01", "Ada"), ("", "Ben"), ("", "Cy")], existing=["TAKEN1"])
+
+    assert assigned[0] == ("KEEP01", "Ada")
+    codes = [code for code, _ in assigned]
+    assert len(set(codes)) == 3 and "TAKEN1" not in codes
+    assert all(len(code) == CODE_LENGTH and set(code) <= set(CODE_ALPHABET) for code in codes[1:])
+
+@pytest.mark.parametrize("count, sizes", [
+    (0, []),
+    (MAX_BATCH_SIZE, [MAX_BATCH_SIZE]),
+    (2 * MAX_BATCH_SIZE + 1, [MAX_BATCH_SIZE, MAX_BATCH_SIZE, 1]),
+])
+def test_documents_are_written_in_full_batches(count, sizes):
+    store = RecordingStore()
+
+    assert write_documents(store, "students", students(count), workers=2) == len(sizes)
+
+    assert sorted(store.batch_sizes, reverse=True) == sizes
+    if count:
+        assert store.get("students", "C0000") == {"unique_code": "C0000", "user_name": "Student 0"}
+
+def test_a_failed_batch_is_raised():
+    class FailingStore(RecordingStore):
+        def set_many(self, writes, replace=None):
+            raise RuntimeError("quota exceeded")
+
+    with pytest.raises(RuntimeError, match="quota"):
+        write_documents(FailingStore(), "students", students(3))
+
+@pytest.fixture
+def files(tmp_path):
+    names = tmp_path / "cohort.csv"
+    names.write_text("name\nAda\nBen\n")
+    return names, tmp_path / "users.txt", tmp_path / "codes.csv"
+
+def test_main_fails_fast_without_a_collection_name(files, monkeypatch):
+    names, roster, sheet = files
+    monkeypatch.setattr(provision, "initialize_firebase", lambda: SQLiteStore())
+    monkeypatch.setattr(firebase_operations, "FIREBASE_COLLECTION_NAME", None)
+
+    with pytest.raises(SystemExit, match="FIREBASE_COLLECTION_NAME"):
+        main([str(names), "--roster", str(roster), "--sheet", str(sheet)])
+    assert not roster.exists() and not sheet.exists()
+
+def test_main_creates_documents_roster_and_sheet(files, monkeypatch):
+    names, roster, sheet = files
+    store = SQLiteStore()
+    monkeypatch.setattr(provision, "initialize_firebase", lambda: store)
+    monkeypatch.setattr(firebase_operations, "FIREBASE_COLLECTION_NAME", "students")
+
+    main([str(names), "--roster", str(roster), "--sheet", str(sheet)])
+
+    with open(roster, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [row["name"] for row in rows] == ["Ada", "Ben"]
+    assert all(store.get("students", row["code"])["user_name"] == row["name"] for row in rows)
+    assert sheet.exists()
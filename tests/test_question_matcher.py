@@ -0,0 +1,33 @@
+import pytest
+from utils.question_matcher import QuestionMatcher
+
+BANK = {
+    "When did the cough start?": "Two days ago.",
+    "Does the child have a fever?": "Yes, up to 39 degrees.",
+    "Is the child eating and drinking?": "Drinking less than usual.",
+    "Any sick contacts at home or daycare?": "His sister had a cold last week.",
+}
+
+@pytest.fixture
+def matcher():
+    return QuestionMatcher(BANK)
+
+def test_rephrased_questions_match(matcher):
+    question, answer, similarity = matcher.match("cough started when?")
+    assert question == "When did the cough start?" and answer == "Two days ago."
+    assert similarity >= QuestionMatcher.THRESHOLD
+
+def test_plurals_and_stop_words_do_not_decide_the_match(matcher):
+    assert matcher.match("any fevers?")[1] == "Yes, up to 39 degrees."
+
+def test_unrelated_questions_fall_below_the_threshold(matcher):
+    assert matcher.match("what is your favourite colour") is None
+    assert matcher.match("is the") is None  # Only stop words
+
+def test_threshold_is_applied_to_the_best_score(matcher, monkeypatch):
+    similarity = matcher.match("fever")[2]
+    monkeypatch.setattr(QuestionMatcher, "THRESHOLD", similarity + 0.01)
+    assert matcher.match("fever") is None
+
+def test_empty_bank_matches_nothing():
+    assert QuestionMatcher({}).match("when did the cough start") is None
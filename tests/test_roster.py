@@ -0,0 +1,53 @@
+import os
+import pytest
+from utils import roster
+from utils.roster import Roster, get_roster
+
+@pytest.fixture
+def roster_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(roster, "_roster", None)
+    path = tmp_path / "users.txt"
+    write(path, "code,name\nA1, Ada \n")
+    return str(path)
+
+def write(path, text, mtime_ns=1_000_000_000):
+    with open(path, "w") as file:
+        file.write(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_lookups_strip_and_skip_blank_codes():
+    students = Roster([(" A1 ", " Ada "), ("", "Nobody"), ("B2", "Ben")])
+
+    assert "A1" in students and "B2" in students
+    assert len(students) == 2
+    assert students.name("A1") == "Ada"
+    assert students.name("Z9") is None
+
+def test_roster_is_reread_when_the_file_changes(roster_file, monkeypatch):
+    monkeypatch.setattr(roster, "CHECK_INTERVAL", 0)
+    first = get_roster(roster_file)
+    assert get_roster(roster_file) is first  # Unchanged file, same object
+
+    write(roster_file, "code,name\nA1,Ada\nB2,Ben\n", mtime_ns=2_000_000_000)
+
+    assert "B2" in get_roster(roster_file)
+
+def test_file_is_not_checked_within_the_interval(roster_file, monkeypatch):
+    monkeypatch.setattr(roster, "CHECK_INTERVAL", 3600)
+    first = get_roster(roster_file)
+
+    write(roster_file, "code,name\nB2,Ben\n", mtime_ns=2_000_000_000)
+
+    assert get_roster(roster_file) is first
+
+    monkeypatch.setattr(roster, "_roster_checked_at", roster._roster_checked_at - 3600)
+    assert "B2" in get_roster(roster_file)
+
+def test_another_path_loads_its_own_roster(roster_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(roster, "CHECK_INTERVAL", 3600)
+    other = tmp_path / "other.txt"
+    write(other, "code,name\nC3,Cy\n")
+
+    get_roster(roster_file)
+
+    assert "C3" in get_roster(str(other))
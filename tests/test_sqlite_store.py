@@ -0,0 +1,44 @@
+from utils.document_store import SQLiteStore, merge_entry
+
+def test_missing_document_is_none():
+    assert SQLiteStore().get("students", "S") is None
+
+def test_set_merges_nested_maps_and_replaces_other_values():
+    store = SQLiteStore()
+    store.set("students", "S", {"vs_data": {"heart_rate": True}, "diagnoses_s1": ["Asthma", "Croup"], "last_page": "intake_form"})
+    store.set("students", "S", {"vs_data": {"weight": False}, "diagnoses_s1": ["Croup"]})
+
+    assert store.get("students", "S") == {
+        "vs_data": {"heart_rate": True, "weight": False},
+        "diagnoses_s1": ["Croup"],
+        "last_page": "intake_form",
+    }
+
+def test_map_replaces_a_scalar_and_scalar_replaces_a_map():
+    assert merge_entry({"a": 1, "b": {"c": 1}}, {"a": {"x": 1}, "b": 2}) == {"a": {"x": 1}, "b": 2}
+
+def test_merge_does_not_alias_the_entry():
+    entry = {"vs_data": {"heart_rate": True}}
+    document = merge_entry({}, entry)
+    entry["vs_data"]["heart_rate"] = False
+    assert document == {"vs_data": {"heart_rate": True}}
+
+def test_set_many_writes_each_document():
+    store = SQLiteStore()
+    store.set_many([(("students", "A"), {"n": 1}), (("students", "B"), {"n": 2}), (("staff", "A"), {"n": 3})])
+    assert [store.get(*key) for key in [("students", "A"), ("students", "B"), ("staff", "A")]] == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+def test_events_are_ordered_and_idempotent_by_seq():
+    store = SQLiteStore()
+    key = ("students", "S", "transcript")
+    store.append_events([(key, {"seq": 2, "question": "b"}), (key, {"seq": 1, "question": "a"})])
+    store.append_events([(key, {"seq": 2, "question": "b"})])  # A retried batch
+
+    assert store.read_events(*key) == [{"seq": 1, "question": "a"}, {"seq": 2, "question": "b"}]
+    assert store.read_events(*key, after_seq=1) == [{"seq": 2, "question": "b"}]
+    assert store.read_events("students", "S", "other") == []
+
+def test_documents_survive_reopening(tmp_path):
+    path = str(tmp_path / "store.db")
+    SQLiteStore(path).set("students", "S", {"last_page": "diagnoses"})
+    assert SQLiteStore(path).get("students", "S") == {"last_page": "diagnoses"}
@@ -0,0 +1,64 @@
+import os
+import pytest
+from PIL import Image
+from utils import tile_pyramid
+from utils.tile_pyramid import DZI_NAME, TILE_OVERLAP, TILE_SIZE, build_pyramid, ensure_pyramid, level_count
+
+@pytest.mark.parametrize("width, height, levels", [
+    (0, 0, 1),
+    (1, 1, 1),
+    (2, 1, 2),
+    (256, 256, 9),
+    (257, 100, 10),  # One pixel over a power of two needs another level
+    (100, 600, 11),
+])
+def test_level_count(width, height, levels):
+    assert level_count(width, height) == levels
+
+@pytest.fixture
+def image_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(tile_pyramid, "TILE_DIR", str(tmp_path / "tiles"))
+    path = tmp_path / "Chest_X-ray.png"
+    Image.new("RGB", (600, 300), "white").save(path)
+    return str(path)
+
+def tile_sizes(root, level):
+    level_dir = os.path.join(root, "image_files", str(level))
+    sizes = {}
+    for name in os.listdir(level_dir):
+        with Image.open(os.path.join(level_dir, name)) as tile:
+            sizes[os.path.splitext(name)[0]] = tile.size
+    return sizes
+
+def test_levels_halve_down_to_one_pixel(image_path):
+    root = build_pyramid(image_path)
+
+    assert sorted(map(int, os.listdir(os.path.join(root, "image_files")))) == list(range(level_count(600, 300)))
+    assert tile_sizes(root, 0) == {"0_0": (1, 1)}
+    assert tile_sizes(root, 8) == {"0_0": (150, 75)}  # 600x300 halved twice, rounded up
+    assert tile_sizes(root, 9) == {"0_0": (257, 150), "1_0": (45, 150)}
+
+def test_full_resolution_tiles_overlap_their_neighbours(image_path):
+    sizes = tile_sizes(build_pyramid(image_path), level_count(600, 300) - 1)
+
+    assert sizes["0_0"] == (TILE_SIZE + TILE_OVERLAP, TILE_SIZE + TILE_OVERLAP)
+    assert sizes["1_0"] == (TILE_SIZE + 2 * TILE_OVERLAP, TILE_SIZE + TILE_OVERLAP)
+    assert sizes["2_1"] == (600 - 2 * TILE_SIZE + TILE_OVERLAP, 300 - TILE_SIZE + TILE_OVERLAP)
+    assert len(sizes) == 6
+
+def test_descriptor_and_reuse(image_path):
+    root = build_pyramid(image_path)
+    with open(os.path.join(root, DZI_NAME)) as file:
+        descriptor = file.read()
+
+    assert f'TileSize="{TILE_SIZE}"' in descriptor and f'Overlap="{TILE_OVERLAP}"' in descriptor
+    assert '<Size Width="600" Height="300"/>' in descriptor
+    assert ensure_pyramid(image_path) == root
+    assert not [name for name in os.listdir(tile_pyramid.TILE_DIR) if name.endswith(".tmp")]
+
+def test_unreadable_images_are_not_tiled(tmp_path, monkeypatch):
+    monkeypatch.setattr(tile_pyramid, "TILE_DIR", str(tmp_path / "tiles"))
+    path = tmp_path / "broken.png"
+    path.write_bytes(b"not an image")
+
+    assert ensure_pyramid(str(path)) is None
@@ -0,0 +1,70 @@
+import pytest
+import streamlit as st
+from utils import firebase_operations
+from utils.document_store import SQLiteStore
+from utils.history_with_ai import TRANSCRIPT_LOG, load_existing_data, migrate_legacy_transcript, remove_duplicates
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(firebase_operations, "FIREBASE_COLLECTION_NAME", "students")
+    monkeypatch.setattr(firebase_operations, "WRITE_JOURNAL", "")
+    monkeypatch.setattr(firebase_operations, "_start_writer", lambda: None)  # Flush by hand only
+    st.session_state.clear()
+    yield SQLiteStore()
+    st.session_state.clear()
+    firebase_operations._pending_events.clear()
+    firebase_operations._pending_writes.clear()
+
+def new_session():
+    st.session_state.clear()
+
+def test_remove_duplicates_keeps_the_first_answer():
+    assert remove_duplicates(["a", "b", "a"], ["1", "2", "3"]) == (["a", "b"], ["1", "2"])
+
+def test_events_are_read_after_a_sequence_number(store):
+    for seq in (1, 2, 3):
+        firebase_operations.append_event(store, "S", TRANSCRIPT_LOG, {"seq": seq, "question": f"q{seq}"})
+    firebase_operations.flush(store)
+    firebase_operations.append_event(store, "S", TRANSCRIPT_LOG, {"seq": 4, "question": "q4"})  # Still queued
+
+    assert [event["seq"] for event in load_existing_data(store, "S")] == [1, 2, 3, 4]
+    assert [event["seq"] for event in load_existing_data(store, "S", after_seq=2)] == [3, 4]
+
+def test_reading_never_writes(store):
+    store.set("students", "S", {"questions_asked": ["q1"], "responses": ["a1"]})
+    assert load_existing_data(store, "S") == []
+    firebase_operations.flush(store)
+    assert store.read_events("students", "S", TRANSCRIPT_LOG) == []
+
+def test_legacy_arrays_are_migrated_once(store):
+    store.set("students", "S", {"questions_asked": ["q1", "q2", "q1"], "responses": ["a1", "a2", "a3"]})
+
+    migrate_legacy_transcript(store, "S")
+    firebase_operations.flush(store)
+
+    expected = [{"seq": 1, "question": "q1", "response": "a1"}, {"seq": 2, "question": "q2", "response": "a2"}]
+    assert store.read_events("students", "S", TRANSCRIPT_LOG) == expected
+    assert store.get("students", "S")["transcript_migrated"] is True
+
+    new_session()
+    migrate_legacy_transcript(store, "S")
+    assert firebase_operations._pending_events == []  # Already migrated
+
+def test_concurrent_migrations_write_the_same_events(store):
+    store.set("students", "S", {"questions_asked": ["q1", "q2"], "responses": ["a1", "a2"]})
+
+    migrate_legacy_transcript(store, "S")
+    pending = list(firebase_operations._pending_events)
+    firebase_operations._pending_events.clear()
+    new_session()
+    migrate_legacy_transcript(store, "S")  # A second session that read the document before the first flushed
+    firebase_operations._pending_events[:0] = pending
+    firebase_operations.flush(store)
+
+    assert [event["seq"] for event in store.read_events("students", "S", TRANSCRIPT_LOG)] == [1, 2]
+
+def test_documents_without_a_legacy_transcript_are_left_alone(store):
+    store.set("students", "S", {"user_name": "Ada"})
+    migrate_legacy_transcript(store, "S")
+    firebase_operations.flush(store)
+    assert store.get("students", "S") == {"user_name": "Ada"}
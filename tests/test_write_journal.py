@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import pytest
+import streamlit as st
+from utils import firebase_operations
+from utils.document_store import SQLiteStore
+from utils.write_journal import WriteJournal, new_key
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.db")
+
+def crash(journal):
+    journal.close()  # Releases the owner lock, as the operating system does for a dead process
+
+def test_rows_are_replayed_when_reopened_under_the_same_pid(path):
+    first = WriteJournal(path)
+    first.record("k1", "students", "S", {"a": 1})
+    first.record("k2", "students", "S", {"seq": 1}, log_name="transcript")
+    first.record("k3", "students", "S", {"matrix": {}}, replace=["matrix"])
+    crash(first)
+
+    second = WriteJournal(path)  # Same PID, as after a container restart
+
+    assert second.adopt_orphans() == [
+        ("k1", "students", "S", None, {"a": 1}, []),
+        ("k2", "students", "S", "transcript", {"seq": 1}, []),
+        ("k3", "students", "S", None, {"matrix": {}}, ["matrix"]),
+    ]
+    assert second.adopt_orphans() == []  # Now owned by second
+    assert len(second) == 3
+
+def test_rows_of_a_live_owner_are_left_alone(path):
+    running = WriteJournal(path)
+    running.record("k1", "students", "S", {"a": 1})
+
+    assert WriteJournal(path).adopt_orphans() == []
+
+    running.discard(["k1"])
+    assert len(running) == 0
+
+def test_rows_owned_by_a_pid_are_adopted(path):
+    journal = WriteJournal(path)
+    with journal._conn:  # Rows written by the version that recorded the PID as owner
+        journal._conn.execute(
+            "INSERT INTO writes (idempotency_key, owner, collection_name, document_id, log_name, data, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ("old", os.getpid(), "students", "S", None, json.dumps({"a": 1}), time.time()),
+        )
+
+    assert journal.adopt_orphans() == [("old", "students", "S", None, {"a": 1}, [])]
+
+def test_lock_files_of_exited_processes_are_removed(path):
+    crash(WriteJournal(path))
+    journal = WriteJournal(path)
+
+    journal.adopt_orphans()
+
+    assert os.listdir(f"{path}.owners") == [f"{journal.owner}.lock"]
+
+@pytest.fixture
+def queue(path, monkeypatch):
+    monkeypatch.setattr(firebase_operations, "FIREBASE_COLLECTION_NAME", "students")
+    monkeypatch.setattr(firebase_operations, "WRITE_JOURNAL", path)
+    monkeypatch.setattr(firebase_operations, "_journal", None)
+    monkeypatch.setattr(firebase_operations, "_journal_replayed", False)
+    monkeypatch.setattr(firebase_operations, "_writer_db", None)
+    started = []
+    monkeypatch.setattr(firebase_operations, "_start_writer", lambda: started.append(True))
+    st.session_state.clear()
+    yield started
+    st.session_state.clear()
+    for pending in (firebase_operations._pending_writes, firebase_operations._pending_replace,
+                    firebase_operations._pending_futures, firebase_operations._pending_journal_keys):
+        pending.clear()
+    firebase_operations._pending_events.clear()
+
+def test_startup_replay_sends_a_crashed_process_writes(path, queue):
+    crashed = WriteJournal(path)
+    crashed.record(new_key(), "students", "S", {"a": 1, "matrix": {"x": 1}})
+    crashed.record(new_key(), "students", "S", {"matrix": {"y": 2}}, replace=["matrix"])
+    crashed.record(new_key(), "students", "S", {"seq": 1, "question": "q"}, log_name="transcript")
+    crash(crashed)
+    store = SQLiteStore()
+    store.set("students", "S", {"matrix": {"old": 0}})
+
+    firebase_operations._replay_journal(store)
+
+    assert queue  # The writer was started without waiting for a page to upload
+    firebase_operations.flush()
+    assert store.get("students", "S") == {"a": 1, "matrix": {"y": 2}}
+    assert store.read_events("students", "S", "transcript") == [{"seq": 1, "question": "q"}]
+    assert len(firebase_operations._get_journal()) == 0
+
+def test_replay_runs_once_per_process(path, queue):
+    firebase_operations._replay_journal(SQLiteStore())
+    crashed = WriteJournal(path)
+    crashed.record(new_key(), "students", "S", {"a": 1})
+    crash(crashed)
+
+    firebase_operations._replay_journal(SQLiteStore())
+
+    assert firebase_operations._pending_writes == {}
+
+def test_retry_delay_grows_and_is_capped(monkeypatch):
+    monkeypatch.setattr(firebase_operations.random, "uniform", lambda low, high: high)
+    interval = firebase_operations.FLUSH_INTERVAL
+
+    assert [firebase_operations._retry_delay(n) for n in (1, 2, 3)] == [interval * 2, interval * 4, interval * 8]
+    assert firebase_operations._retry_delay(100) == firebase_operations.RETRY_MAX_DELAY
+
+def test_retry_delay_is_jittered():
+    delays = {firebase_operations._retry_delay(3) for _ in range(20)}
+    full = firebase_operations.FLUSH_INTERVAL * 8
+    assert len(delays) > 1 and all(full / 2 <= delay <= full for delay in delays)
+
+def test_writer_backs_off_until_a_flush_succeeds(monkeypatch):
+    class Stop(Exception):
+        pass
+
+    results = iter([RuntimeError("unavailable"), RuntimeError("unavailable"), None, RuntimeError("unavailable")])
+    def write_pending(db):
+        result = next(results)
+        if result:
+            raise result
+    sleeps = []
+    def sleep(delay):
+        sleeps.append(delay)
+        if len(sleeps) == 3:
+            raise Stop
+
+    monkeypatch.setattr(firebase_operations, "FLUSH_INTERVAL", 0.001)
+    monkeypatch.setattr(firebase_operations, "_write_pending", write_pending)
+    monkeypatch.setattr(firebase_operations, "_retry_delay", lambda failures: failures)
+    monkeypatch.setattr(firebase_operations.time, "sleep", sleep)
+
+    with pytest.raises(Stop):
+        firebase_operations._writer_loop()
+
+    assert sleeps == [1, 2, 1]  # The success in between reset the count
@@ -0,0 +1,84 @@
+import pytest
+import streamlit as st
+from utils import firebase_operations
+from utils.document_store import SQLiteStore
+
+class RecordingStore(SQLiteStore):
+    """SQLite store that remembers each batch and can be told to fail."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.failures = 0
+
+    def set_many(self, writes, replace=None):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("unavailable")
+        self.batches.append(list(writes))
+        super().set_many(writes, replace)
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(firebase_operations, "FIREBASE_COLLECTION_NAME", "students")
+    monkeypatch.setattr(firebase_operations, "WRITE_JOURNAL", "")
+    monkeypatch.setattr(firebase_operations, "_start_writer", lambda: None)  # Flush by hand only
+    st.session_state.clear()
+    yield RecordingStore()
+    st.session_state.clear()
+    firebase_operations._pending_writes.clear()
+    firebase_operations._pending_replace.clear()
+    firebase_operations._pending_futures.clear()
+    firebase_operations._pending_journal_keys.clear()
+    firebase_operations._failed_attempts.clear()
+
+def test_upload_only_queues(store):
+    future = firebase_operations.upload_to_firebase(store, "S", {"last_page": "diagnoses"})
+
+    assert not future.done()
+    assert store.batches == []
+    assert firebase_operations.upload_status("S") == "saving"
+
+def test_entries_for_one_document_are_merged(store):
+    firebase_operations.upload_to_firebase(store, "S", {"vs_data": {"heart_rate": True}, "last_page": "intake_form"})
+    firebase_operations.upload_to_firebase(store, "S", {"vs_data": {"weight": False}, "last_page": "diagnoses"})
+    firebase_operations.flush(store)
+
+    assert store.batches == [[(("students", "S"), {"vs_data": {"heart_rate": True, "weight": False}, "last_page": "diagnoses"})]]
+
+def test_batches_are_split_at_the_firestore_limit(store):
+    count = firebase_operations.MAX_BATCH_SIZE * 2 + 1
+    futures = [firebase_operations.upload_to_firebase(store, f"S{i}", {"last_page": "diagnoses"}) for i in range(count)]
+    firebase_operations.flush(store)
+
+    assert [len(batch) for batch in store.batches] == [firebase_operations.MAX_BATCH_SIZE] * 2 + [1]
+    assert all(future.done() for future in futures)
+
+def test_failed_flush_requeues_under_newer_entries(store):
+    first = firebase_operations.upload_to_firebase(store, "S", {"last_page": "intake_form", "user_name": "Ada"})
+    store.failures = 1
+    with pytest.raises(RuntimeError):
+        firebase_operations.flush(store)
+
+    assert firebase_operations.upload_status("S") == "retrying"
+    second = firebase_operations.upload_to_firebase(store, "S", {"last_page": "diagnoses"})
+    firebase_operations.flush(store)
+
+    assert first.done() and second.done()
+    assert store.get("students", "S") == {"last_page": "diagnoses", "user_name": "Ada"}
+    assert firebase_operations.upload_status("S") == "saved"
+
+def test_events_are_written_after_documents(store):
+    firebase_operations.append_event(store, "S", "transcript", {"seq": 1, "question": "q"})
+    assert firebase_operations.read_events(store, "S", "transcript") == [{"seq": 1, "question": "q"}]  # Queued events are visible
+
+    firebase_operations.flush(store)
+    assert store.read_events("students", "S", "transcript") == [{"seq": 1, "question": "q"}]
+
+def test_wait_for_uploads_only_waits_on_the_session(store):
+    firebase_operations.upload_to_firebase(store, "S", {"last_page": "Simple Success"})
+    assert not firebase_operations.wait_for_uploads("S", timeout=0.01)
+
+    firebase_operations.flush(store)
+    assert firebase_operations.wait_for_uploads("S", timeout=0.01)
+    assert firebase_operations.wait_for_uploads("someone else", timeout=0.01)
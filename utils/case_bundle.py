@@ -0,0 +1,181 @@
+# utils/case_bundle.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the case text files, and where the compiled bundle is written
+CASE_DIR = os.getenv("CASE_DIR", ".")
+BUNDLE_FILENAME = ".case_bundle.json"
+BUNDLE_FORMAT = 2  # Bump when the parsed layout changes so old bundles are recompiled
+CHECK_INTERVAL = 2.0  # Seconds between mtime checks of the source files
+
+# Bundle field -> source file
+CASE_FILES = {
+    "patient_info": "ptinfo.txt",
+    "vital_signs": "vital_signs.txt",
+    "diagnoses": "dx_list.txt",
+    "lab_tests": "labtests.txt",
+    "rad_tests": "radtests.txt",
+    "other_tests": "other_tests.txt",
+    "interventions": "int.txt",
+    "phys_exam": "phys_exam.txt",
+    "question_bank": "croup.txt",
+    "results": "results.txt",
+    "dx_aliases": "dx_aliases.txt",  # Optional: "alias,diagnosis" lines (abbreviations, synonyms, ICD codes)
+}
+
+OPTIONAL_FILES = {"dx_aliases"}
+
+CaseBundle = namedtuple("CaseBundle", ["version"] + list(CASE_FILES))
+
+_bundle = None
+_bundle_checked_at = 0.0
+_bundle_mtimes = None
+_bundle_lock = threading.Lock()
+
+def _parse_lines(text):
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def _parse_vital_signs(text):
+    vital_signs = {}
+    for line in text.splitlines():
+        if ',' in line:  # Ensure the line contains a comma
+            key, value = line.split(',', 1)  # Split only on the first comma
+            vital_signs[key.strip()] = value.strip()
+    return vital_signs
+
+def _parse_question_bank(text):
+    question_bank = {}
+    for block in text.strip().split("\n\n"):  # Split by double newlines (space)
+        lines = block.strip().split("\n")
+        if len(lines) >= 2 and "Q: " in lines[0] and "A: " in lines[1]:
+            question = lines[0].split("Q: ", 1)[1].strip().lower()
+            answer = lines[1].split("A: ", 1)[1].strip().lower()
+            question_bank[question] = answer
+    return question_bank
+
+def _parse_aliases(text):
+    aliases = []
+    for line in text.splitlines():
+        if ',' in line:
+            alias, diagnosis = line.split(',', 1)
+            if alias.strip() and diagnosis.strip():
+                aliases.append([alias.strip(), diagnosis.strip()])
+    return aliases
+
+def _parse_sections(text):
+    return [section for section in text.split('\n\n') if section.strip()]  # Sections are separated by double newlines
+
+PARSERS = {
+    "patient_info": lambda text: text,
+    "vital_signs": _parse_vital_signs,
+    "diagnoses": _parse_lines,
+    "lab_tests": _parse_lines,
+    "rad_tests": _parse_lines,
+    "other_tests": _parse_lines,
+    "interventions": _parse_lines,
+    "phys_exam": _parse_sections,
+    "question_bank": _parse_question_bank,
+    "results": _parse_lines,
+    "dx_aliases": _parse_aliases,
+}
+
+def _source_mtimes(case_dir):
+    mtimes = {}
+    for field, filename in CASE_FILES.items():
+        try:
+            mtimes[field] = os.stat(os.path.join(case_dir, filename)).st_mtime_ns
+        except FileNotFoundError:
+            mtimes[field] = None
+    return mtimes
+
+def compile_case(case_dir=CASE_DIR):
+    """Parse every case file in case_dir into a plain dict, ready to be written as a bundle."""
+    digest = hashlib.sha256()
+    fields = {}
+    for field, filename in CASE_FILES.items():
+        try:
+            with open(os.path.join(case_dir, filename), 'r') as file:
+                text = file.read()
+        except FileNotFoundError:
+            if field not in OPTIONAL_FILES:
+                logger.warning(f"Case file not found: {filename}")
+            text = ""
+        digest.update(filename.encode() + b"\0" + text.encode() + b"\0")
+        fields[field] = PARSERS[field](text)
+
+    fields["version"] = digest.hexdigest()[:16]
+    return fields
+
+def write_bundle(fields, mtimes, case_dir=CASE_DIR):
+    """Write the compiled bundle next to the case files, atomically."""
+    path = os.path.join(case_dir, BUNDLE_FILENAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump({"format": BUNDLE_FORMAT, "mtimes": mtimes, "fields": fields}, file)
+    os.replace(tmp_path, path)
+
+def _read_bundle(case_dir, mtimes):
+    """Return the compiled fields if the bundle on disk matches the current sources."""
+    path = os.path.join(case_dir, BUNDLE_FILENAME)
+    try:
+        with open(path, 'rb') as file:
+            compiled = json.loads(file.read())
+    except (OSError, ValueError):
+        return None
+    if compiled.get("format") != BUNDLE_FORMAT or compiled.get("mtimes") != mtimes:
+        return None
+    return compiled["fields"]
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def get_case_bundle(case_dir=CASE_DIR):
+    """Return the read-only case bundle shared by every session in this process.
+
+    The source files are only stat'ed every CHECK_INTERVAL seconds; when one changes the
+    bundle is recompiled, written to disk for the other workers and swapped in.
+    """
+    global _bundle, _bundle_checked_at, _bundle_mtimes
+
+    now = time.monotonic()
+    if _bundle is not None and now - _bundle_checked_at < CHECK_INTERVAL:
+        return _bundle
+
+    with _bundle_lock:
+        if _bundle is not None and now - _bundle_checked_at < CHECK_INTERVAL:
+            return _bundle
+
+        mtimes = _source_mtimes(case_dir)
+        if _bundle is None or mtimes != _bundle_mtimes:
+            fields = _read_bundle(case_dir, mtimes)
+            if fields is None:
+                fields = compile_case(case_dir)
+                try:
+                    write_bundle(fields, mtimes, case_dir)
+                except OSError as e:
+                    logger.warning(f"Could not write compiled case bundle: {e}")
+            _bundle = CaseBundle(**{field: _freeze(value) for field, value in fields.items()})
+            _bundle_mtimes = mtimes
+            logger.info(f"Loaded case bundle {_bundle.version}")
+
+        _bundle_checked_at = now
+        return _bundle
+
+if __name__ == "__main__":
+    # Precompile the bundle, e.g. as a deploy step: python -m utils.case_bundle
+    fields = compile_case()
+    write_bundle(fields, _source_mtimes(CASE_DIR))
+    print(f"Compiled case bundle {fields['version']} into {os.path.join(CASE_DIR, BUNDLE_FILENAME)}")
@@ -0,0 +1,211 @@
+# utils/case_ingest.py
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from utils.case_bundle import CASE_FILES
+
+INGEST_FORMAT = 1  # Bump when the output layout changes so cached cases are rebuilt
+CACHE_FILENAME = ".ingest.json"
+PDF_DPI = 150
+
+# Heading text (lowercase, without a trailing colon) -> section of the case
+SECTION_TITLES = {
+    "patient information": "patient_info",
+    "patient info": "patient_info",
+    "presentation": "patient_info",
+    "vital signs": "vital_signs",
+    "vitals": "vital_signs",
+    "history": "question_bank",
+    "questions": "question_bank",
+    "question bank": "question_bank",
+    "physical examination": "phys_exam",
+    "physical exam": "phys_exam",
+    "results": "results",
+}
+
+# Spelled-out vital sign -> key the intake form reads
+VITAL_KEYS = {
+    "heart rate": "heart_rate", "hr": "heart_rate", "pulse": "heart_rate",
+    "blood pressure": "blood_pressure", "bp": "blood_pressure",
+    "respiratory rate": "respiratory_rate", "rr": "respiratory_rate",
+    "pulse ox": "pulseox", "pulseox": "pulseox", "spo2": "pulseox", "oxygen saturation": "pulseox",
+    "temperature": "temperature", "temp": "temperature",
+    "weight": "weight", "wt": "weight",
+}
+
+_QA_RE = re.compile(r"Q:\s*(.+?)\s*A:\s*(.+?)\s*(?=Q:|\Z)", re.S)
+_PAGE_RE = re.compile(r"^(.*?)\s*\(page\s*(\d+)\)\s*$", re.I)
+
+def source_hash(path):
+    digest = hashlib.sha256(f"{INGEST_FORMAT}\0".encode())
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _docx_blocks(path):
+    """Paragraphs of a .docx as (text, is_heading, [(extension, image bytes), ...])."""
+    import docx
+
+    document = docx.Document(path)
+    blocks = []
+    for paragraph in document.paragraphs:
+        images = []
+        for blip in paragraph._p.xpath(".//a:blip"):
+            part = document.part.related_parts.get(blip.get("{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed"))
+            if part is not None:
+                images.append((os.path.splitext(part.partname)[1].lower(), part.blob))
+        heading = paragraph.style is not None and paragraph.style.name.lower().startswith(("heading", "title"))
+        blocks.append((paragraph.text, heading, images))
+    return blocks
+
+def _pdf_blocks(path):
+    """Lines of a PDF's text layer as blocks. Result images come from page rasters instead."""
+    text = subprocess.run(["pdftotext", "-layout", path, "-"], check=True, capture_output=True, text=True).stdout
+    return [(line, False, []) for line in text.splitlines()]
+
+def _section_of(text, heading):
+    title = text.strip().rstrip(":").strip().lower()
+    if title in SECTION_TITLES and (heading or text.strip().endswith(":") or len(title.split()) <= 3):
+        return SECTION_TITLES[title]
+    return None
+
+def parse_case(path):
+    """Split a case source into its sections. Runs in a worker process.
+
+    Returns {"sections": {field: text}, "images": {result name: (extension, bytes)},
+    "pages": {result name: page number}}. Text before the first heading is read as Q/A pairs.
+    """
+    blocks = _pdf_blocks(path) if path.lower().endswith(".pdf") else _docx_blocks(path)
+
+    lines = {}
+    images = {}
+    pages = {}
+    section = "question_bank"
+    last_result = None
+    for text, heading, block_images in blocks:
+        new_section = _section_of(text, heading)
+        if new_section:
+            section = new_section
+            continue
+        if section == "results":
+            if text.strip():
+                name = text.strip()
+                page = _PAGE_RE.match(name)
+                if page:
+                    name = page.group(1)
+                    pages[name] = int(page.group(2))
+                last_result = name
+                lines.setdefault(section, []).append(name)
+            if block_images and last_result and last_result not in images:
+                images[last_result] = block_images[0]
+            continue
+        lines.setdefault(section, []).append(text)
+
+    return {"sections": {field: "\n".join(text) for field, text in lines.items()}, "images": images, "pages": pages}
+
+def format_sections(sections):
+    """Render parsed sections as the text files utils.case_bundle reads. Returns {filename: text}."""
+    files = {}
+    if sections.get("patient_info", "").strip():
+        files[CASE_FILES["patient_info"]] = " ".join(sections["patient_info"].split()) + "\n"
+
+    if sections.get("vital_signs", "").strip():
+        rows = ["type,vital_signs"]
+        for line in sections["vital_signs"].splitlines():
+            if ":" in line or "," in line:
+                name, value = re.split(r"[:,]", line, maxsplit=1)
+                key = VITAL_KEYS.get(name.strip().lower(), name.strip().lower().replace(" ", "_"))
+                rows.append(f"{key},{value.strip()}")
+        files[CASE_FILES["vital_signs"]] = "\n".join(rows) + "\n"
+
+    pairs = _QA_RE.findall(sections.get("question_bank", ""))
+    if pairs:
+        files[CASE_FILES["question_bank"]] = "\n\n".join(
+            f"Q: {' '.join(question.split())}\nA: {' '.join(answer.split())}" for question, answer in pairs
+        ) + "\n"
+
+    if sections.get("phys_exam", "").strip():
+        components = [" ".join(line.split()) for line in sections["phys_exam"].splitlines() if line.strip()]
+        files[CASE_FILES["phys_exam"]] = "\n\n".join(components) + "\n"
+
+    if sections.get("results", "").strip():
+        files[CASE_FILES["results"]] = sections["results"].strip() + "\n"
+    return files
+
+def _rasterize(path, page, dpi, out_path):
+    """Render one PDF page to PNG. Runs in a worker process."""
+    from pdf2image import convert_from_path
+
+    convert_from_path(path, dpi=dpi, first_page=page, last_page=page)[0].save(out_path)
+    return out_path
+
+def _cached(out_dir, digest):
+    try:
+        with open(os.path.join(out_dir, CACHE_FILENAME)) as file:
+            return json.load(file).get("source_sha256") == digest
+    except (OSError, ValueError):
+        return False
+
+def ingest(sources, out_root, workers=None, dpi=PDF_DPI, force=False):
+    """Convert case sources into case directories under out_root, one per source file name.
+
+    Sources whose hash matches the last ingest are skipped. Parsing and PDF page rendering run in
+    a process pool. Returns {source: "cached" | "ingested"}.
+    """
+    status = {}
+    todo = []
+    for source in sources:
+        out_dir = os.path.join(out_root, os.path.splitext(os.path.basename(source))[0])
+        digest = source_hash(source)
+        if not force and _cached(out_dir, digest):
+            status[source] = "cached"
+        else:
+            todo.append((source, out_dir, digest))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = list(pool.map(parse_case, [source for source, _, _ in todo]))
+
+        rasters = []
+        for (source, out_dir, digest), case in zip(todo, parsed):
+            os.makedirs(out_dir, exist_ok=True)
+            for filename, text in format_sections(case["sections"]).items():
+                with open(os.path.join(out_dir, filename), 'w') as file:
+                    file.write(text)
+            for name, (extension, blob) in case["images"].items():
+                with open(os.path.join(out_dir, name.replace(" ", "_") + extension), 'wb') as file:
+                    file.write(blob)
+            for name, page in case["pages"].items():
+                rasters.append(pool.submit(_rasterize, source, page, dpi, os.path.join(out_dir, name.replace(" ", "_") + ".png")))
+
+        for future in rasters:
+            future.result()
+
+    # Record hashes last, so an interrupted run is redone next time
+    for source, out_dir, digest in todo:
+        with open(os.path.join(out_dir, CACHE_FILENAME), 'w') as file:
+            json.dump({"source": os.path.abspath(source), "source_sha256": digest, "format": INGEST_FORMAT}, file)
+        status[source] = "ingested"
+    return status
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert .docx/PDF case sources into case text files and images.")
+    parser.add_argument("sources", nargs="+", help=".docx or .pdf files, one case each")
+    parser.add_argument("--out", default="cases", help="directory that receives one folder per case")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--dpi", type=int, default=PDF_DPI, help="resolution of rendered PDF pages")
+    parser.add_argument("--force", action="store_true", help="re-ingest even if a source is unchanged")
+    args = parser.parse_args(argv)
+
+    for source, result in ingest(args.sources, args.out, args.workers, args.dpi, args.force).items():
+        print(f"{result:9} {source}")
+
+if __name__ == "__main__":
+    # python -m utils.case_ingest cases_src/*.docx --out cases
+    sys.exit(main())
@@ -1,25 +1,25 @@
 import streamlit as st
-from utils.file_operations import read_diagnoses_from_file
+from utils.diagnosis_search import get_diagnosis_index
 from utils.session_management import collect_session_data
-from utils.firebase_operations import upload_to_firebase
+from utils.firebase_operations import upload_to_firebase, get_student
+from utils.page_registry import advance
+
+def prefetch():
+    """Build the diagnosis search index before the student reaches this page."""
+    get_diagnosis_index()
 
 def display_diagnoses(db, document_id):
     # Initialize the diagnoses session state if not present
     if 'diagnoses' not in st.session_state:
-        # Load existing diagnoses from Firebase
-        collection_name = st.secrets["FIREBASE_COLLECTION_NAME"]
-        user_data = db.collection(collection_name).document(document_id).get()
-        if user_data.exists:
-            st.session_state.diagnoses = user_data.to_dict().get('diagnoses_s1', [""] * 5)
-        else:
-            st.session_state.diagnoses = [""] * 5  # Default to empty if no data
+        # Load existing diagnoses from the session model loaded at login
+        st.session_state.diagnoses = list(get_student(db, document_id).diagnoses_s1) or [""] * 5  # Default to empty if no data
 
     # Check if assessment data exists
     if 'vs_data' not in st.session_state or not st.session_state.vs_data:
         st.error("Please complete the assessment before updating diagnoses.")
         return
 
-    dx_options = read_diagnoses_from_file()
+    dx_index = get_diagnosis_index()
 
     st.markdown("""## DIFFERENTIAL DIAGNOSIS
     Please search and select 5 possible diagnoses for the condition you think the patient has in order of likelihood. You will be allowed to alter your choices as you go through the case.""")
@@ -31,11 +31,11 @@ def display_diagnoses(db, document_id):
             current_diagnosis = st.session_state.diagnoses[i]
             search_input = st.text_input(f"Diagnosis # {i + 1}", value=current_diagnosis, key=f"diagnosis_search_{i}")
 
-            filtered_options = [dx for dx in dx_options if search_input.lower() in dx.lower()] if search_input else []
+            filtered_options = dx_index.search(search_input, limit=5) if search_input else []
 
             if filtered_options:
                 st.write("**Suggestions:**")
-                for option in filtered_options[:5]:
+                for option in filtered_options:
                     button_key = f"select_option_{i}_{option}"
                     if st.button(f"{option}", key=button_key):
                         st.session_state.diagnoses[i] = option
@@ -48,7 +48,7 @@ def display_diagnoses(db, document_id):
                 st.warning("Please select a diagnosis from the suggestions. If there are no suggestions, please alter your search and try again.")
 
             # Update the diagnoses in session state for persistence
-            if current_diagnosis and current_diagnosis in dx_options:
+            if current_diagnosis and current_diagnosis in dx_index:
                 st.session_state.diagnoses[i] = current_diagnosis
 
     if st.button("Submit"):
@@ -70,7 +70,7 @@ def display_diagnoses(db, document_id):
                     upload_message = upload_to_firebase(db, document_id, entry)
                     st.success("Diagnoses submitted successfully.")
 
-                    st.session_state.page = "Intervention Entry"  # Set to next page
+                    advance("diagnoses")  # Next page in the flow
                     st.rerun()
                 except Exception as e:
                     st.error(f"Error uploading data: {e}")
@@ -0,0 +1,240 @@
+# utils/diagnosis_search.py
+
+import re
+import heapq
+import bisect
+import threading
+from utils.case_bundle import get_case_bundle
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+def alias_key(text):
+    """Aliases match ignoring case, spacing and dots, so "J05.0" and "j050" are the same code."""
+    return normalize(text).replace(".", "")
+
+def trigrams(word):
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class DiagnosisIndex:
+    """Prebuilt search index over the diagnosis catalogue.
+
+    Entries are deduplicated (ignoring case and spacing). A query is matched, in rank order, as the
+    whole name, a prefix of the name, a prefix of every query word against the name's words, and
+    finally as a substring. Within a tier shorter names rank first. A tier is only evaluated while
+    the better tiers have not filled the requested number of results.
+
+    Aliases (abbreviations such as "RSV", synonyms, ICD codes) rank right after an exact match. If
+    nothing above matched at all, misspelled words are corrected against the catalogue's
+    word list using a character-trigram index, so "bronchiolitus" still finds "Acute bronchiolitis".
+    """
+
+    FUZZY_MIN_SIMILARITY = 0.4  # Dice coefficient over trigrams
+    FUZZY_MAX_CORRECTIONS = 5  # Candidate words kept per misspelled query word
+    SHORT_PREFIX_LENGTH = 2
+    SHORT_PREFIX_KEEP = 64  # Enough for any page's top-k plus the excluded current diagnoses
+
+    def __init__(self, diagnoses, aliases=()):
+        seen = set()
+        self.entries = []
+        for diagnosis in diagnoses:
+            key = normalize(diagnosis)
+            if key and key not in seen:
+                seen.add(key)
+                self.entries.append(diagnosis.strip())
+
+        self._names = [normalize(entry) for entry in self.entries]
+        self._sorted_names = sorted((name, i) for i, name in enumerate(self._names))
+        self._exact = {name: i for i, name in enumerate(self._names)}
+
+        # One- and two-letter prefixes match huge ranges, so keep their best entries ready
+        self._short_prefixes = {}
+        for name, i in self._sorted_names:
+            for size in range(1, self.SHORT_PREFIX_LENGTH + 1):
+                if len(name) >= size:
+                    self._short_prefixes.setdefault(name[:size], []).append(i)
+        for prefix, ids in self._short_prefixes.items():
+            self._short_prefixes[prefix] = heapq.nsmallest(self.SHORT_PREFIX_KEEP, ids, key=self._order)
+
+        postings = {}
+        for i, name in enumerate(self._names):
+            for token in set(tokenize(name)):
+                postings.setdefault(token, []).append(i)
+        self._tokens = sorted(postings)
+        self._postings = [postings[token] for token in self._tokens]
+        token_ids = {token: t for t, token in enumerate(self._tokens)}
+        self._entry_tokens = [tuple(token_ids[token] for token in set(tokenize(name))) for name in self._names]
+
+        # Trigram -> ids into self._tokens, for correcting misspelled words
+        self._token_trigram_counts = [len(trigrams(token)) for token in self._tokens]
+        self._trigram_postings = {}
+        for t, token in enumerate(self._tokens):
+            for trigram in trigrams(token):
+                self._trigram_postings.setdefault(trigram, []).append(t)
+
+        # Alias -> ids of the diagnoses it stands for
+        self._aliases = {}
+        for alias, diagnosis in aliases:
+            i = self._exact.get(normalize(diagnosis))
+            if i is not None:
+                self._aliases.setdefault(alias_key(alias), []).append(i)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, diagnosis):
+        return normalize(diagnosis) in self._exact
+
+    def _prefix_range(self, sorted_keys, prefix, key=lambda item: item):
+        lo = bisect.bisect_left(sorted_keys, prefix, key=key)
+        hi = bisect.bisect_left(sorted_keys, prefix + "\uffff", key=key)
+        return lo, hi
+
+    def _token_matches(self, query_tokens):
+        """Ids whose words start with every query word."""
+        ranges = sorted(
+            (self._prefix_range(self._tokens, query_token) for query_token in query_tokens),
+            key=lambda bounds: bounds[1] - bounds[0],
+        )
+        matches = None
+        for lo, hi in ranges:  # Narrowest word first, so empty results stop early
+            ids = set()
+            for postings in self._postings[lo:hi]:
+                ids.update(postings)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return set()
+        return matches or set()
+
+    def _substring_matches(self, query):
+        """Ids whose name contains query. Candidates come from the word list, not a catalogue scan."""
+        words = tokenize(query)
+        if not words:
+            return [i for i, name in enumerate(self._names) if query in name]
+
+        # Any name containing the query contains its longest word inside one of its own words
+        longest = max(words, key=len)
+        ids = set()
+        for token, postings in zip(self._tokens, self._postings):
+            if longest in token:
+                ids.update(postings)
+        if query == longest:
+            return ids
+        return [i for i in ids if query in self._names[i]]
+
+    def _corrections(self, word):
+        """Words from the catalogue that look like word, most similar first, as (token id, similarity)."""
+        word_trigrams = trigrams(word)
+        overlap = {}
+        for trigram in word_trigrams:
+            for t in self._trigram_postings.get(trigram, ()):
+                overlap[t] = overlap.get(t, 0) + 1
+
+        scored = []
+        for t, shared in overlap.items():
+            similarity = 2 * shared / (len(word_trigrams) + self._token_trigram_counts[t])
+            if similarity >= self.FUZZY_MIN_SIMILARITY:
+                scored.append((similarity, t))
+        return [(t, similarity) for similarity, t in heapq.nlargest(self.FUZZY_MAX_CORRECTIONS, scored)]
+
+    def _fuzzy_scores(self, query_tokens):
+        """Score ids matching every query word as a word prefix or a close misspelling (higher is better)."""
+        per_word = []  # For each query word: token id -> similarity
+        for query_token in query_tokens:
+            lo, hi = self._prefix_range(self._tokens, query_token)
+            similarities = {t: 1.0 for t in range(lo, hi)}
+            if len(query_token) >= 3:
+                for t, similarity in self._corrections(query_token):
+                    similarities.setdefault(t, similarity)
+            if not similarities:
+                return {}
+            per_word.append(similarities)
+
+        # Start from the word with the fewest postings, then check the others per entry
+        per_word.sort(key=lambda similarities: sum(len(self._postings[t]) for t in similarities))
+        scores = {}
+        for t, similarity in per_word[0].items():
+            for i in self._postings[t]:
+                if similarity > scores.get(i, 0):
+                    scores[i] = similarity
+
+        for similarities in per_word[1:]:
+            narrowed = {}
+            for i, score in scores.items():
+                best = max((similarities.get(t, 0) for t in self._entry_tokens[i]), default=0)
+                if best:
+                    narrowed[i] = score + best
+            scores = narrowed
+            if not scores:
+                break
+        return scores
+
+    def _order(self, i):
+        return (len(self._names[i]), self._names[i])
+
+    def search(self, query, limit=10, exclude=()):
+        """Return up to limit diagnoses matching query, best match first. limit=None returns all."""
+        query = normalize(query)
+        if not query:
+            return []
+
+        excluded = {normalize(item) for item in exclude if item}
+        results = []
+        seen = set()
+        matched = False  # Whether any tier found the query as typed, even if only excluded entries
+
+        def tiers():
+            # (candidate ids, sort key) per tier, best tier first
+            yield ([self._exact[query]] if query in self._exact else []), self._order
+            yield self._aliases.get(alias_key(query), []), self._order
+            if len(query) <= self.SHORT_PREFIX_LENGTH and limit is not None and limit <= self.SHORT_PREFIX_KEEP - len(excluded):
+                yield self._short_prefixes.get(query, []), self._order
+            else:
+                lo, hi = self._prefix_range(self._sorted_names, query, key=lambda item: item[0])
+                yield [i for _, i in self._sorted_names[lo:hi]], self._order
+            query_tokens = tokenize(query)
+            yield (self._token_matches(query_tokens) if query_tokens else []), self._order
+            yield self._substring_matches(query), self._order
+            if query_tokens and not matched:  # Only guess at misspellings when nothing matched as typed
+                scores = self._fuzzy_scores(query_tokens)
+                yield scores, lambda i: (-scores[i],) + self._order(i)
+
+        for candidates, key in tiers():
+            matched = matched or bool(candidates)
+            candidates = [i for i in candidates if i not in seen and self._names[i] not in excluded]
+            if limit is None:
+                best = sorted(candidates, key=key)
+            else:
+                best = heapq.nsmallest(limit - len(results), candidates, key=key)
+            results.extend(best)
+            seen.update(best)
+            if limit is not None and len(results) >= limit:
+                break
+
+        return [self.entries[i] for i in results]
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+def get_diagnosis_index():
+    """Return the index for the current case bundle, shared by every session in this process."""
+    global _index, _index_version
+
+    case = get_case_bundle()
+    if _index_version != case.version:
+        with _index_lock:
+            if _index_version != case.version:
+                _index = DiagnosisIndex(case.diagnoses, case.dx_aliases)
+                _index_version = case.version
+    return _index
+
+def search_diagnoses(query, limit=10, exclude=()):
+    """Search the case's diagnosis catalogue. See DiagnosisIndex.search."""
+    return get_diagnosis_index().search(query, limit=limit, exclude=exclude)
@@ -0,0 +1,102 @@
+# utils/diagnosis_sidebar.py
+
+import streamlit as st
+from utils.diagnosis_search import search_diagnoses
+from utils.matrix_assessment import GRID_FRAGMENT
+
+SUGGESTIONS_PER_PAGE = 8  # Suggestion buttons shown at once; the rest are paged
+SIDEBAR_FRAGMENT = "diagnosis_sidebar"
+
+def diagnosis_sidebar(snapshot_key=None):
+    """Render the "Reorder Diagnoses / Change a Diagnosis" sidebar shared by the assessment pages.
+
+    The sidebar runs as a fragment, so picking a diagnosis, typing a search or paging through
+    suggestions only reruns the sidebar. When st.session_state.diagnoses actually changes, the
+    sidebar and the page's matrix_assessment grid are rerun together; the rest of the page is
+    not. snapshot_key, if given, names a session state list (e.g. "diagnoses_s3") that is kept
+    equal to the non-empty diagnoses.
+    """
+    if 'selected_moving_diagnosis' not in st.session_state:
+        st.session_state.selected_moving_diagnosis = ""
+    if 'diagnosis_suggestion_page' not in st.session_state:
+        st.session_state.diagnosis_suggestion_page = 0
+
+    with st.sidebar:
+        _sidebar_fragment(snapshot_key)
+
+def _diagnoses_changed(snapshot_key):
+    if snapshot_key:
+        st.session_state[snapshot_key] = [dx for dx in st.session_state.diagnoses if dx]  # Update with current order
+    st.rerun([SIDEBAR_FRAGMENT, GRID_FRAGMENT])  # The grid headers follow the order
+
+def _move_diagnosis(snapshot_key):
+    diagnoses = st.session_state.diagnoses
+    idx = diagnoses.index(st.session_state.move_diagnosis)
+    target = idx - 1 if st.session_state.move_direction == "Higher Priority" else idx + 1
+    if 0 <= target < len(diagnoses):
+        diagnoses[idx], diagnoses[target] = diagnoses[target], diagnoses[idx]
+        st.session_state.selected_moving_diagnosis = diagnoses[target]
+        _diagnoses_changed(snapshot_key)
+
+def _replace_diagnosis(old, new, snapshot_key):
+    diagnoses = st.session_state.diagnoses
+    if old in diagnoses:
+        diagnoses[diagnoses.index(old)] = new
+        st.session_state.diagnosis_suggestion_page = 0
+        _diagnoses_changed(snapshot_key)
+
+def _reset_suggestion_page():
+    st.session_state.diagnosis_suggestion_page = 0
+
+def _turn_suggestion_page(step):
+    st.session_state.diagnosis_suggestion_page += step
+
+@st.fragment(key=SIDEBAR_FRAGMENT)
+def _sidebar_fragment(snapshot_key):
+    diagnoses = st.session_state.diagnoses
+
+    st.subheader("Reorder Diagnoses")
+
+    st.selectbox(
+        "Select a diagnosis to move",
+        options=diagnoses,
+        index=diagnoses.index(st.session_state.selected_moving_diagnosis) if st.session_state.selected_moving_diagnosis in diagnoses else 0,
+        key="move_diagnosis"
+    )
+
+    st.radio("Adjust Priority:", options=["Higher Priority", "Lower Priority"], key="move_direction")
+
+    st.button("Adjust Priority", on_click=_move_diagnosis, args=(snapshot_key,))
+
+    # Change a diagnosis section
+    st.subheader("Change a Diagnosis")
+    change_diagnosis = st.selectbox(
+        "Select a diagnosis to change",
+        options=diagnoses,
+        key="change_diagnosis"
+    )
+
+    new_diagnosis_search = st.text_input("Search for a new diagnosis", "", key="new_diagnosis_search", on_change=_reset_suggestion_page)
+    if not new_diagnosis_search:
+        return
+
+    # Fetch one past the current page to know whether there is a next one
+    page = st.session_state.diagnosis_suggestion_page
+    start = page * SUGGESTIONS_PER_PAGE
+    new_filtered_options = search_diagnoses(new_diagnosis_search, limit=start + SUGGESTIONS_PER_PAGE + 1, exclude=diagnoses)
+    shown = new_filtered_options[start:start + SUGGESTIONS_PER_PAGE]
+    if not shown:
+        st.write("No matching diagnoses.")
+        return
+
+    st.write("**Available Options:**")
+    for option in shown:
+        st.button(f"{option}", key=f"select_new_{option}", on_click=_replace_diagnosis, args=(change_diagnosis, option, snapshot_key))
+
+    previous_col, next_col = st.columns(2)
+    with previous_col:
+        if page > 0:
+            st.button("Previous", key="diagnosis_suggestions_previous", on_click=_turn_suggestion_page, args=(-1,))
+    with next_col:
+        if len(new_filtered_options) > start + SUGGESTIONS_PER_PAGE:
+            st.button("More", key="diagnosis_suggestions_next", on_click=_turn_suggestion_page, args=(1,))
@@ -0,0 +1,191 @@
+# utils/document_store.py
+
+import json
+import sqlite3
+import threading
+
+def merge_entry(target, entry, replace=()):
+    """Merge entry into target the same way Firestore's set(merge=True) does.
+
+    Top-level fields named in replace are overwritten as a whole instead of merged.
+    """
+    for key, value in entry.items():
+        if key in replace:
+            target[key] = merge_entry({}, value) if isinstance(value, dict) else value
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_entry(target[key], value)
+        elif isinstance(value, dict):
+            target[key] = merge_entry({}, value)
+        else:
+            target[key] = value
+    return target
+
+def changed_fields(document, entry, replace=()):
+    """Return the part of entry that merging it into document would actually change.
+
+    Maps are compared leaf by leaf; any other value (lists included, since Firestore can only
+    replace an array) is kept whole if it differs, as are fields named in replace. Merging the
+    result into document gives the same document as merging entry.
+    """
+    changed = {}
+    for key, value in entry.items():
+        if key in replace:
+            if document.get(key) != value:
+                changed[key] = value
+        elif isinstance(value, dict) and isinstance(document.get(key), dict):
+            nested = changed_fields(document[key], value)
+            if nested:
+                changed[key] = nested
+        elif key not in document or document[key] != value:
+            changed[key] = value
+    return changed
+
+class DocumentStore:
+    """The few document operations the app needs. Pages only talk to this interface."""
+
+    def get(self, collection_name, document_id):
+        """Return the document as a dict, or None if it does not exist."""
+        raise NotImplementedError
+
+    def set_many(self, writes, replace=None):
+        """Merge each (collection_name, document_id), entry pair into its document in one batch.
+
+        replace maps (collection_name, document_id) to top-level fields that are overwritten as a
+        whole rather than merged, for values whose old keys must not survive.
+        """
+        raise NotImplementedError
+
+    def set(self, collection_name, document_id, entry, replace=()):
+        self.set_many([((collection_name, document_id), entry)], {(collection_name, document_id): replace})
+
+    def append_events(self, events):
+        """Append each (collection_name, document_id, log_name), event pair to that document's log.
+
+        Events carry an integer "seq" that is unique within their log; appending the same seq twice
+        overwrites it, so retries are safe.
+        """
+        raise NotImplementedError
+
+    def read_events(self, collection_name, document_id, log_name, after_seq=0):
+        """Return the log's events with seq > after_seq, oldest first."""
+        raise NotImplementedError
+
+    def warm(self, collection_name):
+        """Open connections ahead of the first real request. Nothing to do by default."""
+
+def _merge_paths(entry, replace, prefix=()):
+    """Field paths for set(merge=[...]): replaced fields whole, every other leaf of entry by itself."""
+    from google.cloud.firestore_v1.field_path import FieldPath
+
+    paths = []
+    for key, value in entry.items():
+        if not prefix and key in replace:
+            paths.append(FieldPath(key))
+        elif isinstance(value, dict) and value:
+            paths += _merge_paths(value, replace, prefix + (key,))
+        else:
+            paths.append(FieldPath(*prefix, key))
+    return paths
+
+class FirestoreStore(DocumentStore):
+    """Document store backed by a firestore.client()."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, collection_name, document_id):
+        user_data = self.client.collection(collection_name).document(document_id).get()
+        return user_data.to_dict() if user_data.exists else None
+
+    def warm(self, collection_name):
+        try:
+            # A one-document query opens the gRPC channel and fetches an auth token
+            list(self.client.collection(collection_name).limit(1).stream())
+        except Exception:
+            pass  # Warming is best effort; real requests report their own errors
+
+    def set_many(self, writes, replace=None):
+        batch = self.client.batch()
+        for key, entry in writes:
+            fields = (replace or {}).get(key)
+            # An explicit field mask overwrites the replaced fields and still merges the others leaf by leaf
+            merge = _merge_paths(entry, fields) if fields else True
+            batch.set(self.client.collection(key[0]).document(key[1]), entry, merge=merge)
+        batch.commit()
+
+    def _log(self, collection_name, document_id, log_name):
+        # Each log is a subcollection of the student's document, one small document per event
+        return self.client.collection(collection_name).document(document_id).collection(log_name)
+
+    def append_events(self, events):
+        batch = self.client.batch()
+        for (collection_name, document_id, log_name), event in events:
+            batch.set(self._log(collection_name, document_id, log_name).document(f"{event['seq']:08d}"), event)
+        batch.commit()
+
+    def read_events(self, collection_name, document_id, log_name, after_seq=0):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        query = self._log(collection_name, document_id, log_name).where(filter=FieldFilter("seq", ">", after_seq)).order_by("seq")
+        return [snapshot.to_dict() for snapshot in query.stream()]
+
+class SQLiteStore(DocumentStore):
+    """Local document store with Firestore merge semantics, for offline runs and load tests.
+
+    Documents are kept as JSON in a single table. Use ":memory:" for a throwaway store.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "collection_name TEXT NOT NULL, document_id TEXT NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (collection_name, document_id))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "collection_name TEXT NOT NULL, document_id TEXT NOT NULL, log_name TEXT NOT NULL, seq INTEGER NOT NULL, "
+            "data TEXT NOT NULL, PRIMARY KEY (collection_name, document_id, log_name, seq))"
+        )
+        self._conn.commit()
+
+    def _read(self, collection_name, document_id):
+        row = self._conn.execute(
+            "SELECT data FROM documents WHERE collection_name = ? AND document_id = ?",
+            (collection_name, document_id),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get(self, collection_name, document_id):
+        with self._lock:
+            return self._read(collection_name, document_id)
+
+    def set_many(self, writes, replace=None):
+        with self._lock, self._conn:  # One transaction, like a Firestore batch
+            for (collection_name, document_id), entry in writes:
+                fields = (replace or {}).get((collection_name, document_id), ())
+                document = merge_entry(self._read(collection_name, document_id) or {}, entry, fields)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents (collection_name, document_id, data) VALUES (?, ?, ?)",
+                    (collection_name, document_id, json.dumps(document)),
+                )
+
+    def append_events(self, events):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO events (collection_name, document_id, log_name, seq, data) VALUES (?, ?, ?, ?, ?)",
+                [(collection_name, document_id, log_name, event["seq"], json.dumps(event))
+                 for (collection_name, document_id, log_name), event in events],
+            )
+
+    def read_events(self, collection_name, document_id, log_name, after_seq=0):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM events WHERE collection_name = ? AND document_id = ? AND log_name = ? AND seq > ? ORDER BY seq",
+                (collection_name, document_id, log_name, after_seq),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
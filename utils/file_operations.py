@@ -1,10 +1,10 @@
 # utils/file_operations.py
 
-import pandas as pd
+from utils.roster import get_roster
 
 def load_users():
-    #return pd.read_csv('users.csv')
-    return pd.read_csv('users.txt')
+    #return get_roster('users.csv')
+    return get_roster()  # Indexed by code and shared across sessions; re-read when users.txt changes
 def read_text_file(file_path):
     try:
         with open(file_path, 'r') as file:
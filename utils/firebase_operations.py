@@ -1,67 +1,422 @@
 # firebase_operations.py
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
 import os
+import copy
 import json
+import time
+import atexit
+import random
+import logging
+import threading
+from concurrent.futures import Future, wait
+from utils.document_store import FirestoreStore, SQLiteStore, changed_fields, merge_entry
+from utils.session_model import StudentSession
+from utils.write_journal import WRITE_JOURNAL, WriteJournal, new_key
 
 # Define a global variable
 FIREBASE_COLLECTION_NAME = None
 
-# Initialize Firebase
-def initialize_firebase():
-    global FIREBASE_COLLECTION_NAME  # Use the global variable
+# Storage backend: "firestore" (default) or "sqlite" for offline runs and load tests
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore").lower()
+SQLITE_DATABASE = os.getenv("SQLITE_DATABASE", ":memory:")
+
+# Write-behind queue: entries waiting to be written, merged per document
+FLUSH_INTERVAL = float(os.getenv("FIREBASE_FLUSH_INTERVAL", "0.5"))  # Seconds between background flushes
+MAX_BATCH_SIZE = 500  # Firestore limit on operations per batched write
+RETRY_MAX_DELAY = 30.0  # Seconds; failed flushes back off exponentially up to this
+
+_pending_writes = {}  # (collection_name, document_id) -> merged entry
+_pending_events = []  # ((collection_name, document_id, log_name), event, future, journal key), in append order
+_pending_replace = {}  # (collection_name, document_id) -> top-level fields its pending write overwrites
+_pending_futures = {}  # (collection_name, document_id) -> futures of the entries merged into its pending write
+_pending_journal_keys = {}  # (collection_name, document_id) -> journal keys of those entries
+_failed_attempts = {}  # (collection_name, document_id) -> consecutive failed writes, while it is being retried
+_pending_lock = threading.Lock()
+_flush_lock = threading.Lock()  # Only one flush talks to Firestore at a time
+_flush_event = threading.Event()
+_writer_db = None
+_writer_thread = None
+_journal = None
+_journal_replayed = False
+
+logger = logging.getLogger(__name__)
+
+def _resolve_collection_name():
+    """Collection name from the environment, falling back to Streamlit secrets."""
+    collection_name = os.getenv('FIREBASE_COLLECTION_NAME')
+    if collection_name:
+        return collection_name
+    try:
+        return st.secrets["FIREBASE_COLLECTION_NAME"]
+    except Exception:
+        return None
+
+@st.cache_resource
+def _firebase_resources():
+    """Create the document store and resolve its config once per process.
+
+    Every session shares the returned store, so they all reuse one Firestore client and gRPC channel.
+    Writes a previous run journaled but never sent are queued again here, at startup.
+    """
+    collection_name = _resolve_collection_name()
+
+    if STORAGE_BACKEND == "sqlite":
+        store = SQLiteStore(SQLITE_DATABASE)
+        _replay_journal(store)
+        return store, collection_name or "students"
 
     FIREBASE_KEY_JSON = os.getenv('FIREBASE_KEY')
-    FIREBASE_COLLECTION_NAME = os.getenv('FIREBASE_COLLECTION_NAME')
-    
     if FIREBASE_KEY_JSON is None:
         raise ValueError("FIREBASE_KEY environment variable not set.")
 
     try:
+        # Imported here so the SQLite backend never loads the Firebase SDK
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
         firebase_credentials = json.loads(FIREBASE_KEY_JSON)
 
         if not firebase_admin._apps:
             cred = credentials.Certificate(firebase_credentials)
             firebase_admin.initialize_app(cred)
 
-        return firestore.client()
+        store = FirestoreStore(firestore.client())
     except Exception as e:
         raise Exception(f"Error initializing Firebase: {e}")
 
-def upload_to_firebase(db, document_id, entry):
-    global FIREBASE_COLLECTION_NAME  # Access the global variable
+    # Open the channel in the background so the first student does not pay the handshake
+    if collection_name:
+        threading.Thread(target=store.warm, args=(collection_name,), name="firestore-warmup", daemon=True).start()
+    _replay_journal(store)
+    return store, collection_name
+
+# Initialize Firebase (or the local store) and return the document store the pages use
+def initialize_firebase():
+    global FIREBASE_COLLECTION_NAME  # Use the global variable
+
+    store, FIREBASE_COLLECTION_NAME = _firebase_resources()
+    return store
+
+def upload_to_firebase(db, document_id, entry, replace=()):
+    """Queue an entry for the background writer instead of writing it inline.
+
+    Returns a Future that resolves once the entry is in Firestore. Pages never wait on it;
+    upload_status() reports progress on later reruns. Only the fields that differ from the
+    session's copy of the document are sent. Top-level fields named in replace overwrite the
+    stored value instead of merging into it.
+    """
+    global FIREBASE_COLLECTION_NAME, _writer_db  # Access the global variables
     
     if FIREBASE_COLLECTION_NAME is None:
         raise ValueError("FIREBASE_COLLECTION_NAME is not set.")
     
-    db.collection(FIREBASE_COLLECTION_NAME).document(document_id).set(entry, merge=True) 
+    cache = st.session_state.setdefault("document_cache", {})
+    if document_id in cache:
+        entry = changed_fields(cache[document_id], entry, replace)
+    replace = [field for field in replace if field in entry]
+
+    future = Future()
+    if not entry:
+        future.set_result(True)  # Nothing changed, so there is nothing to write
+        _track_upload(document_id, future)
+        return future
+
+    journal_key = _journal_record(document_id, entry, replace=replace)
+    with _pending_lock:
+        _writer_db = db
+        key = (FIREBASE_COLLECTION_NAME, document_id)
+        merge_entry(_pending_writes.setdefault(key, {}), copy.deepcopy(entry), replace)
+        _pending_replace.setdefault(key, set()).update(replace)
+        _pending_futures.setdefault(key, []).append(future)
+        _pending_journal_keys.setdefault(key, []).append(journal_key)
+    _track_upload(document_id, future)
+
+    # Write through to this session's copies so later pages never need to read the document again
+    if document_id in cache:
+        merge_entry(cache[document_id], copy.deepcopy(entry), replace)
+    student = st.session_state.get("student")
+    if student is not None and student.document_id == document_id:
+        student.apply(entry, replace)
+
+    _start_writer()
+    return future
+
+def get_document(db, document_id):
+    """Return the document as a dict, reading Firestore at most once per session; uploads write through."""
+    cache = st.session_state.setdefault("document_cache", {})
+    if document_id not in cache:
+        # Snapshot this session's unsent writes first so a flush during the read cannot lose them
+        key = (FIREBASE_COLLECTION_NAME, document_id)
+        with _pending_lock:
+            pending = copy.deepcopy(_pending_writes.get(key, {}))
+            replace = set(_pending_replace.get(key, ()))
+
+        user_data = db.get(FIREBASE_COLLECTION_NAME, document_id)
+        cache[document_id] = merge_entry(user_data or {}, pending, replace)
+
+    return copy.deepcopy(cache[document_id])
+
+def hydrate_student(db, document_id):
+    """Read the student's document once and keep it as the session's StudentSession."""
+    st.session_state.student = StudentSession.from_document(document_id, get_document(db, document_id))
+    return st.session_state.student
+
+def get_student(db, document_id):
+    """Return the session's StudentSession, hydrating it if the session has none yet (e.g. after a refresh)."""
+    student = st.session_state.get("student")
+    if student is None or student.document_id != document_id:
+        student = hydrate_student(db, document_id)
+    return student
+
+def append_event(db, document_id, log_name, event):
+    """Queue one event for a document's append-only log (see DocumentStore.append_events). Returns a Future."""
+    global _writer_db
+
+    if FIREBASE_COLLECTION_NAME is None:
+        raise ValueError("FIREBASE_COLLECTION_NAME is not set.")
+
+    future = Future()
+    journal_key = _journal_record(document_id, event, log_name)
+    with _pending_lock:
+        _writer_db = db
+        _pending_events.append(((FIREBASE_COLLECTION_NAME, document_id, log_name), copy.deepcopy(event), future, journal_key))
+    _track_upload(document_id, future)
+
+    _start_writer()
+    return future
+
+def read_events(db, document_id, log_name, after_seq=0):
+    """Return a log's events with seq > after_seq, oldest first, including ones still queued."""
+    key = (FIREBASE_COLLECTION_NAME, document_id, log_name)
+    with _pending_lock:
+        pending = [copy.deepcopy(event) for event_key, event, _, _ in _pending_events if event_key == key]
+
+    events = {event["seq"]: event for event in db.read_events(FIREBASE_COLLECTION_NAME, document_id, log_name, after_seq)}
+    events.update((event["seq"], event) for event in pending if event["seq"] > after_seq)
+    return [events[seq] for seq in sorted(events)]
+
+def flush(db=None):
+    """Write every pending entry now. Raises if Firestore rejects the batch."""
+    with _flush_lock:
+        _write_pending(db or _writer_db)
     return "Data uploaded to Firebase."
 
+def _write_pending(db):
+    with _pending_lock:
+        items = list(_pending_writes.items())
+        _pending_writes.clear()
+        replace = {key: _pending_replace.pop(key, set()) for key, _ in items}
+        futures = {key: _pending_futures.pop(key, []) for key, _ in items}
+        journal_keys = {key: _pending_journal_keys.pop(key, []) for key, _ in items}
+        events = list(_pending_events)
+        _pending_events.clear()
+
+    if not items and not events:
+        return
+
+    for start in range(0, len(items), MAX_BATCH_SIZE):
+        chunk = items[start:start + MAX_BATCH_SIZE]
+        try:
+            db.set_many(chunk, {key: sorted(replace[key]) for key, _ in chunk if replace[key]})
+        except Exception:
+            # Put the unwritten entries back underneath anything queued since
+            with _pending_lock:
+                for key, entry in items[start:]:
+                    newer_replace = _pending_replace.get(key, set())
+                    _pending_writes[key] = merge_entry(entry, _pending_writes.get(key, {}), newer_replace)
+                    _pending_replace[key] = replace[key] | newer_replace
+                    _pending_futures[key] = futures[key] + _pending_futures.get(key, [])
+                    _pending_journal_keys[key] = journal_keys[key] + _pending_journal_keys.get(key, [])
+                    _failed_attempts[key] = _failed_attempts.get(key, 0) + 1
+                _pending_events[:0] = events
+            raise
+        _resolve([(key, futures[key], journal_keys[key]) for key, _ in chunk])
+
+    for start in range(0, len(events), MAX_BATCH_SIZE):
+        chunk = events[start:start + MAX_BATCH_SIZE]
+        try:
+            db.append_events([(key, event) for key, event, _, _ in chunk])
+        except Exception:
+            with _pending_lock:
+                _pending_events[:0] = events[start:]
+                for key, _, _, _ in events[start:]:
+                    _failed_attempts[key[:2]] = _failed_attempts.get(key[:2], 0) + 1
+            raise
+        _resolve([(key[:2], [future], [journal_key]) for key, _, future, journal_key in chunk])
+
+def _resolve(written):
+    """Mark written entries as saved. written is [((collection_name, document_id), futures, journal keys)]."""
+    with _pending_lock:
+        for key, _, _ in written:
+            _failed_attempts.pop(key, None)
+    _journal_discard(journal_key for _, _, journal_keys in written for journal_key in journal_keys)
+    for _, futures, _ in written:
+        for future in futures:
+            if not future.done():
+                future.set_result(True)
+
+def _get_journal():
+    global _journal
+
+    if _journal is None and WRITE_JOURNAL:
+        with _pending_lock:
+            if _journal is None:
+                try:
+                    _journal = WriteJournal(WRITE_JOURNAL)
+                except Exception as e:
+                    logger.error(f"Could not open write journal {WRITE_JOURNAL}, writes are kept in memory only: {e}")
+                    return None
+    return _journal
+
+def _journal_record(document_id, data, log_name=None, replace=()):
+    """Record a write in the local journal before it is queued. Returns its idempotency key."""
+    key = new_key()
+    journal = _get_journal()
+    if journal is not None:
+        try:
+            journal.record(key, FIREBASE_COLLECTION_NAME, document_id, data, log_name, replace)
+        except Exception as e:
+            logger.error(f"Could not journal write for {document_id}: {e}")
+    return key
+
+def _journal_discard(keys):
+    journal = _get_journal()
+    if journal is not None:
+        try:
+            journal.discard(keys)
+        except Exception as e:
+            logger.warning(f"Could not clear written entries from the journal: {e}")
+
+def _replay_journal(db):
+    """Queue the writes a crashed process journaled but never sent, ahead of anything queued since.
+
+    Runs once per process; the background writer is started to send them to db.
+    """
+    global _journal_replayed, _writer_db
+
+    journal = _get_journal()
+    if _journal_replayed or journal is None:
+        return
+    _journal_replayed = True
+
+    try:
+        rows = journal.adopt_orphans()
+    except Exception as e:
+        logger.error(f"Could not read write journal: {e}")
+        return
+
+    writes = {}
+    replaced = {}
+    journal_keys = {}
+    events = []
+    for journal_key, collection_name, document_id, log_name, data, replace in rows:
+        key = (collection_name, document_id)
+        if log_name is None:
+            merge_entry(writes.setdefault(key, {}), data, replace)
+            replaced.setdefault(key, set()).update(replace)
+            journal_keys.setdefault(key, []).append(journal_key)
+        else:
+            events.append(((collection_name, document_id, log_name), data, Future(), journal_key))
+
+    with _pending_lock:
+        for key, entry in writes.items():
+            newer_replace = _pending_replace.get(key, set())
+            _pending_writes[key] = merge_entry(entry, _pending_writes.get(key, {}), newer_replace)
+            _pending_replace[key] = replaced[key] | newer_replace
+            _pending_journal_keys[key] = journal_keys[key] + _pending_journal_keys.get(key, [])
+        _pending_events[:0] = events
+        if rows and _writer_db is None:
+            _writer_db = db
+    if rows:
+        logger.info(f"Replaying {len(rows)} journaled writes from a previous run")
+        _start_writer()
+
+def _track_upload(document_id, future):
+    # Kept per session so each student only sees the status of their own saves
+    uploads = st.session_state.setdefault("uploads", {})
+    uploads[document_id] = [pending for pending in uploads.get(document_id, []) if not pending.done()] + [future]
+
+def upload_status(document_id):
+    """"saving", "retrying" or "saved" for this session's uploads to a document, None if it made none.
+
+    Only looks at futures that are already resolved, so it never blocks the render.
+    """
+    futures = st.session_state.get("uploads", {}).get(document_id)
+    if not futures:
+        return None
+    if all(future.done() for future in futures):
+        return "saved"
+    with _pending_lock:
+        failed = _failed_attempts.get((FIREBASE_COLLECTION_NAME, document_id), 0)
+    return "retrying" if failed else "saving"
+
+def _retry_delay(failures):
+    """Exponential backoff with jitter, so every process does not retry a recovering Firestore at once."""
+    return min(RETRY_MAX_DELAY, FLUSH_INTERVAL * 2 ** failures) * random.uniform(0.5, 1.0)
+
+def wait_for_uploads(document_id, timeout=None):
+    """Block until this session's uploads to a document are written. Returns False on timeout.
+
+    Only waits on the session's own futures, so other students' queued writes never hold it up.
+    """
+    futures = st.session_state.get("uploads", {}).get(document_id, [])
+    if not futures:
+        return True
+    _flush_event.set()  # Write now rather than at the next interval
+    _, not_done = wait(futures, timeout=timeout)
+    return not not_done
+
+def _writer_loop():
+    failures = 0
+    while True:
+        _flush_event.wait(FLUSH_INTERVAL)
+        _flush_event.clear()
+        try:
+            with _flush_lock:
+                _write_pending(_writer_db)
+            failures = 0
+        except Exception as e:
+            failures += 1
+            delay = _retry_delay(failures)
+            logger.warning(f"Background Firebase flush failed, retrying in {delay:.1f}s: {e}")
+            time.sleep(delay)
+
+def _start_writer():
+    global _writer_thread
+
+    with _pending_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_writer_loop, name="firebase-writer", daemon=True)
+            _writer_thread.start()
+    _flush_event.set()
+
+@atexit.register
+def _flush_on_exit():
+    if _writer_db is not None:
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"Error flushing Firebase writes on exit: {e}")
+
 # utils/firebase_operations.py
 
 def load_last_page(db, document_id):
-    collection_name = st.secrets["FIREBASE_COLLECTION_NAME"]  # Get collection name from secrets
-    
     # Check if the document ID exists in the database
     if document_id:
-        user_data = db.collection(collection_name).document(document_id).get()
-        if user_data.exists:
-            return user_data.to_dict().get("last_page")  # Return the last_page if found
+        user_data = get_document(db, document_id)
+        if user_data:
+            return user_data.get("last_page")  # Return the last_page if found
     return "welcome"  # Default to 'welcome' if no last_page is found
 
 # Example function to retrieve diagnoses from Firebase
 
 def get_diagnoses_from_firebase(db, document_id):
-    collection_name = st.secrets["FIREBASE_COLLECTION_NAME"]
-    doc_ref = db.collection(collection_name).document(document_id)
-    
-    # Get the document from Firebase
-    user_data = doc_ref.get()
+    # Get the document from Firebase (or the session cache)
+    user_data = get_document(db, document_id)
     
-    if user_data.exists:
+    if user_data:
         # Retrieve the diagnoses data (if it exists)
-        diagnoses = user_data.to_dict().get("diagnoses_s1", None)
+        diagnoses = user_data.get("diagnoses_s1", None)
         return diagnoses  # Return the stored diagnoses data
     return None  # No data found
 
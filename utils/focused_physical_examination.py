@@ -1,15 +1,12 @@
 import streamlit as st
 from utils.session_management import collect_session_data
-from utils.firebase_operations import upload_to_firebase
+from utils.firebase_operations import upload_to_firebase, get_student
+from utils.page_registry import advance
 
 def load_existing_examination(db, document_id):
-    """Load existing questions and responses from Firebase."""
-    collection_name = st.secrets["FIREBASE_COLLECTION_NAME"]
-    user_data = db.collection(collection_name).document(document_id).get()
-    
-    if user_data.exists:
-        return user_data.to_dict().get("excluded_exams", []), user_data.to_dict().get("confirmed_exams", [])
-    return [], []
+    """Load existing examination selections from the session model."""
+    student = get_student(db, document_id)
+    return list(student.excluded_exams), list(student.confirmed_exams)
 
 def display_focused_physical_examination(db, document_id):
     st.title("Focused Physical Examination Selection")
@@ -59,7 +56,7 @@ def display_focused_physical_examination(db, document_id):
             st.success("Your selections have been saved successfully.")
             
             # Change the session state to navigate to the next page
-            st.session_state.page = "Physical Examination Components"
+            advance("Focused Physical Examination")  # Next page in the flow
             st.rerun()  # Rerun to navigate to the next page
 
 
@@ -1,28 +1,18 @@
 import streamlit as st
-import json
-import openai
 import time
 import random
 from utils.session_management import collect_session_data
-from utils.firebase_operations import upload_to_firebase
-
-def read_croup_txt():
-    croup_info = {}
-    with open("croup.txt", "r") as file:
-        content = file.read().strip().split("\n\n")  # Split by double newlines (space)
-        for block in content:
-            lines = block.strip().split("\n")
-            if len(lines) >= 2:
-                question = lines[0].split("Q: ", 1)[1].strip().lower()  # Get question
-                answer = lines[1].split("A: ", 1)[1].strip().lower()    # Get answer
-                croup_info[question] = answer
-    return croup_info
-
-# Load the document content
-croup_info = read_croup_txt()
+from utils.question_matcher import get_question_matcher
+from utils.firebase_operations import upload_to_firebase, get_student, append_event, read_events
+from utils.page_registry import advance
+
+def prefetch():
+    """Build the question matcher before the student reaches this page."""
+    get_question_matcher()
 
 def get_chatgpt_response(user_input):
-    user_input_lower = user_input.lower()
+    # Find the closest question in the case's question bank (fully offline)
+    match = get_question_matcher().match(user_input)
     
     alternative_responses = [
         "I'm not sure about that.",
@@ -31,22 +21,35 @@ def get_chatgpt_response(user_input):
         "I'm not certain.",
     ]
 
-    if user_input_lower in croup_info:
-        answer = croup_info[user_input_lower]
+    if match:
+        question, answer, similarity = match
         # Return the answer directly without calling the API
         return answer
     else:
         return random.choice(alternative_responses)
 
 
-def load_existing_data(db, document_id):
-    """Load existing questions and responses from Firebase."""
-    collection_name = st.secrets["FIREBASE_COLLECTION_NAME"]
-    user_data = db.collection(collection_name).document(document_id).get()
-    
-    if user_data.exists:
-        return user_data.to_dict().get("questions_asked", []), user_data.to_dict().get("responses", [])
-    return [], []
+# Name of the append-only log holding this page's questions and answers
+TRANSCRIPT_LOG = "transcript"
+
+def load_existing_data(db, document_id, after_seq=0):
+    """Load transcript events newer than after_seq from Firebase."""
+    return read_events(db, document_id, TRANSCRIPT_LOG, after_seq)
+
+def migrate_legacy_transcript(db, document_id):
+    """Move a transcript saved as two arrays on the student document into the transcript log.
+
+    Safe to repeat, including from two sessions at once: each event's seq is its position in the
+    arrays, and appending a seq that already exists overwrites it with the same event.
+    """
+    student = get_student(db, document_id)
+    if student.transcript_migrated or not student.questions_asked:
+        return
+    if not read_events(db, document_id, TRANSCRIPT_LOG):  # A non-empty log already holds them
+        questions, responses = remove_duplicates(student.questions_asked, student.responses)
+        for seq, (question, response) in enumerate(zip(questions, responses), start=1):
+            append_event(db, document_id, TRANSCRIPT_LOG, {"seq": seq, "question": question, "response": response})
+    upload_to_firebase(db, document_id, {'transcript_migrated': True})
 
 def remove_duplicates(questions, responses):
     """Remove duplicates from questions and responses."""
@@ -62,6 +65,19 @@ def remove_duplicates(questions, responses):
 
     return unique_questions, unique_responses
 
+def add_to_transcript(event):
+    """Append one event to the session's transcript and to the sidebar text."""
+    session_data = st.session_state.session_data
+    session_data['questions_asked'].append(event['question'])
+    session_data['responses'].append(event['response'])
+    session_data['seq'] = max(session_data['seq'], event['seq'])
+    session_data['sidebar_markdown'] += f"**Q:** {event['question']}\n\n**A:** {event['response']}\n\n"
+
+def sync_transcript(db, document_id):
+    """Read only the events this session has not seen yet."""
+    for event in load_existing_data(db, document_id, after_seq=st.session_state.session_data['seq']):
+        add_to_transcript(event)
+
 def run_virtual_patient(db, document_id):
     st.title("Virtual Patient")
 
@@ -76,26 +92,18 @@ def run_virtual_patient(db, document_id):
     if 'session_data' not in st.session_state:
         st.session_state.session_data = {
             'questions_asked': [],
-            'responses': []
+            'responses': [],
+            'seq': 0,  # Highest event sequence number already in this session
+            'sidebar_markdown': "",
         }
+        # Load the existing transcript from Firebase once; later reruns only append
+        migrate_legacy_transcript(db, document_id)
+        sync_transcript(db, document_id)
 
-    # Load existing data from Firebase
-    existing_questions, existing_responses = load_existing_data(db, document_id)
-    st.session_state.session_data['questions_asked'].extend(existing_questions)
-    st.session_state.session_data['responses'].extend(existing_responses)
-
-    # Remove duplicates
-    st.session_state.session_data['questions_asked'], st.session_state.session_data['responses'] = remove_duplicates(
-        st.session_state.session_data['questions_asked'], 
-        st.session_state.session_data['responses']
-    )
-
-    # Display existing questions and responses in the sidebar
+    # Display existing questions and responses in the sidebar as one element
     with st.sidebar:
         st.header("Questions and Responses")
-        for question, response in zip(st.session_state.session_data['questions_asked'], st.session_state.session_data['responses']):
-            st.write(f"**Q:** {question}")
-            st.write(f"**A:** {response}")
+        st.markdown(st.session_state.session_data['sidebar_markdown'])
 
     elapsed_time = (time.time() - st.session_state.start_time) / 60
 
@@ -106,36 +114,31 @@ def run_virtual_patient(db, document_id):
 
             if submit_button and user_input:
                 # Process the user input
-                st.session_state.session_data['questions_asked'].append(user_input)
-
                 virtual_patient_response = get_chatgpt_response(user_input)
-                st.session_state.session_data['responses'].append(virtual_patient_response)
-
-                # Clear the input field
-                st.rerun()
-
-                # Display the new response
-                st.write(f"Virtual Patient: {virtual_patient_response}")
 
-                # Collect session data and prepare for upload to Firebase
-                entry = collect_session_data()  # Collect session data
-                entry['questions_asked'] = st.session_state.session_data['questions_asked']
-                entry['responses'] = st.session_state.session_data['responses']  # Include responses
-
-                # Upload to Firebase
+                # Write only the new question and answer to the log
+                event = {
+                    'seq': st.session_state.session_data['seq'] + 1,
+                    'question': user_input,
+                    'response': virtual_patient_response,
+                    'asked_at': time.time(),
+                }
                 try:
-                    upload_message = upload_to_firebase(db, document_id, entry)
-                    st.success("Your questions have been saved successfully.")
+                    append_event(db, document_id, TRANSCRIPT_LOG, event)
+                    add_to_transcript(event)
                 except Exception as e:
                     st.error(f"Error uploading data: {e}")
 
+                # Clear the input field
+                st.rerun()
+
     else:
         st.warning("Session time is up. Please end the session.")
 
     if st.button("End History Taking Session", key="end_session_button"):
         entry = collect_session_data()  # Collect session data
-        entry['questions_asked'] = st.session_state.session_data['questions_asked']
-        entry['responses'] = st.session_state.session_data['responses']
+        # The questions and answers are already in the transcript log; the document only records how far it goes
+        entry['transcript_seq'] = st.session_state.session_data['seq']
         
         # Upload to Firebase
         try:
@@ -145,7 +148,7 @@ def run_virtual_patient(db, document_id):
             st.error(f"Error uploading data: {e}")
 
         st.session_state.start_time = None
-        st.session_state.page = "Focused Physical Examination"
+        advance("History with AI")  # Next page in the flow
         st.write("Session ended. You can start a new session.")
         st.rerun()
 
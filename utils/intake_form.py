@@ -1,14 +1,16 @@
 import streamlit as st
-from utils.file_operations import read_text_file, load_vital_signs
+from utils.case_bundle import get_case_bundle
 from utils.session_management import collect_session_data
-from utils.firebase_operations import upload_to_firebase
+from utils.firebase_operations import upload_to_firebase, get_student
+from utils.page_registry import advance
 
 def display_intake_form(db, document_id):
     st.markdown(f"<h3 style='font-family: \"DejaVu Sans\";'>Welcome {st.session_state.user_name}! Here is the intake form.</h3>", unsafe_allow_html=True)
 
-    # Read and display the text from ptinfo.txt
-    txt_file_path = "ptinfo.txt"
-    document_text = read_text_file(txt_file_path)
+    case = get_case_bundle()
+
+    # Display the patient information from the case bundle
+    document_text = case.patient_info
 
     if document_text:
         title_html = """
@@ -18,9 +20,10 @@ def display_intake_form(db, document_id):
         """
         st.markdown(title_html, unsafe_allow_html=True)
 
+        document_html = document_text.replace('\n', '<br>')
         custom_html = f"""
         <div style="font-family: 'DejaVu Sans'; font-size: 18px; line-height: 1.5; color: #34495e; background-color: #ecf0f1; padding: 15px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-            {document_text.replace('\n', '<br>')}
+            {document_html}
         </div>
         """
         st.markdown(custom_html, unsafe_allow_html=True)
@@ -28,12 +31,10 @@ def display_intake_form(db, document_id):
         st.write("No text found in the document.")
 
     # Load vital signs
-    vital_signs_file = "vital_signs.txt"
-    vital_signs = load_vital_signs(vital_signs_file)
+    vital_signs = case.vital_signs
 
-    # Retrieve existing vital signs from Firebase
-    user_data = db.collection(st.secrets["FIREBASE_COLLECTION_NAME"]).document(document_id).get()
-    existing_data = user_data.to_dict() if user_data.exists else {}
+    # Retrieve existing vital signs from the session model loaded at login
+    existing_vs_data = get_student(db, document_id).vs_data
 
     # Check if vital_signs is not empty before creating checkboxes
     if vital_signs:
@@ -52,22 +53,22 @@ def display_intake_form(db, document_id):
 
             # Checkboxes for vital signs with prefilled values if available
             heart_rate = vital_signs.get("heart_rate", "N/A")
-            heart_rate_checkbox = st.checkbox(f"HEART RATE: {heart_rate}", key='heart_rate_checkbox', value=existing_data.get("vs_data", {}).get("heart_rate", False))
+            heart_rate_checkbox = st.checkbox(f"HEART RATE: {heart_rate}", key='heart_rate_checkbox', value=existing_vs_data.get("heart_rate", False))
             
             respiratory_rate = vital_signs.get("respiratory_rate", "N/A")
-            respiratory_rate_checkbox = st.checkbox(f"RESPIRATORY RATE: {respiratory_rate}", key='respiratory_rate_checkbox', value=existing_data.get("vs_data", {}).get("respiratory_rate", False))
+            respiratory_rate_checkbox = st.checkbox(f"RESPIRATORY RATE: {respiratory_rate}", key='respiratory_rate_checkbox', value=existing_vs_data.get("respiratory_rate", False))
             
             blood_pressure = vital_signs.get("blood_pressure", "N/A")
-            blood_pressure_checkbox = st.checkbox(f"BLOOD PRESSURE: {blood_pressure}", key='blood_pressure_checkbox', value=existing_data.get("vs_data", {}).get("blood_pressure", False))
+            blood_pressure_checkbox = st.checkbox(f"BLOOD PRESSURE: {blood_pressure}", key='blood_pressure_checkbox', value=existing_vs_data.get("blood_pressure", False))
             
             pulseox = vital_signs.get("pulseox", "N/A")
-            pulseox_checkbox = st.checkbox(f"PULSE OXIMETRY: {pulseox}", key='pulseox_checkbox', value=existing_data.get("vs_data", {}).get("pulseox", False))
+            pulseox_checkbox = st.checkbox(f"PULSE OXIMETRY: {pulseox}", key='pulseox_checkbox', value=existing_vs_data.get("pulseox", False))
             
             temperature = vital_signs.get("temperature", "N/A")
-            temperature_checkbox = st.checkbox(f"TEMPERATURE: {temperature}", key='temperature_checkbox', value=existing_data.get("vs_data", {}).get("temperature", False))
+            temperature_checkbox = st.checkbox(f"TEMPERATURE: {temperature}", key='temperature_checkbox', value=existing_vs_data.get("temperature", False))
             
             weight = vital_signs.get("weight", "N/A")
-            weight_checkbox = st.checkbox(f"WEIGHT: {weight}", key='weight_checkbox', value=existing_data.get("vs_data", {}).get("weight", False))
+            weight_checkbox = st.checkbox(f"WEIGHT: {weight}", key='weight_checkbox', value=existing_vs_data.get("weight", False))
 
             st.markdown("</div>", unsafe_allow_html=True)
 
@@ -93,7 +94,7 @@ def display_intake_form(db, document_id):
             
             st.session_state.intake_submitted = True
             
-            st.session_state.page = "diagnoses"  # Move to Diagnoses page
+            advance("intake_form")  # Next page in the flow
             
             st.rerun()  # Rerun the app to refresh the page
 
@@ -1,25 +1,12 @@
 import streamlit as st
 from utils.session_management import collect_session_data
-from utils.firebase_operations import upload_to_firebase
+from utils.case_bundle import get_case_bundle
+from utils.firebase_operations import upload_to_firebase, get_student
+from utils.page_registry import advance
 
 def load_existing_interventions(db, document_id):
-    """Load existing intervention descriptions from Firebase."""
-    collection_name = st.secrets["FIREBASE_COLLECTION_NAME"]
-    user_data = db.collection(collection_name).document(document_id).get()
-    
-    if user_data.exists:
-        return user_data.to_dict().get("interventions", [])
-    return []
-
-def read_intervention_options():
-    """Load intervention options from int.txt."""
-    try:
-        with open('int.txt', 'r') as file:
-            interventions = [line.strip() for line in file.readlines() if line.strip()]
-        return interventions
-    except Exception as e:
-        st.error(f"Error reading int.txt: {e}")
-        return []
+    """Load existing intervention descriptions from the session model."""
+    return list(get_student(db, document_id).interventions)
 
 def main(db, document_id):
     st.title("Intervention Description Entry")
@@ -27,8 +14,8 @@ def main(db, document_id):
     # Load existing interventions
     existing_interventions = load_existing_interventions(db, document_id)
 
-    # Load intervention options from file
-    intervention_options = read_intervention_options()
+    # Load intervention options from the case bundle
+    intervention_options = list(get_case_bundle().interventions)
 
     # Prompt for user input
     st.header("Select any interventions that you would currently perform.")
@@ -52,7 +39,7 @@ def main(db, document_id):
             upload_message = upload_to_firebase(db, document_id, entry)
             
             st.success("Your interventions have been saved successfully.")
-            st.session_state.page = "History with AI"  # Change to the next page
+            advance("Intervention Entry")  # Next page in the flow
             st.session_state.document_id = document_id 
             st.rerun()  # Rerun to navigate to the next page
         else:
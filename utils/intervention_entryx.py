@@ -1,15 +1,10 @@
 import streamlit as st
 from utils.session_management import collect_session_data
-from utils.firebase_operations import upload_to_firebase
+from utils.firebase_operations import upload_to_firebase, get_student
 
 def load_existing_intervention(db, document_id):
-    """Load existing intervention description from Firebase."""
-    collection_name = st.secrets["FIREBASE_COLLECTION_NAME"]
-    user_data = db.collection(collection_name).document(document_id).get()
-    
-    if user_data.exists:
-        return user_data.to_dict().get("interventions", "")
-    return ""
+    """Load existing intervention description from the session model."""
+    return get_student(db, document_id).interventions or ""
 
 def main(db, document_id):
     st.title("Intervention Description Entry")
@@ -1,6 +1,8 @@
 import streamlit as st
 from utils.session_management import collect_session_data
-from utils.firebase_operations import upload_to_firebase
+from utils.firebase_operations import upload_to_firebase, hydrate_student
+from utils.file_operations import load_users
+from utils.page_registry import advance
 
 def login_page(users,db):
 #def login_page(users, db, document_id):  # Accept document_id as a parameter
@@ -12,10 +14,10 @@ def login_page(users,db):
         if unique_code_input:
             unique_code = unique_code_input.strip()  # Keep it as a string
             
-            # Check if the unique_code exists in the 'code' column of the users dataframe
-            if unique_code in users['code'].values:
+            # Check if the unique_code exists in the roster
+            if unique_code in users:
                 # Store the unique code and user name in session state
-                st.session_state.user_name = users.loc[users['code'] == unique_code, 'name'].values[0]
+                st.session_state.user_name = users.name(unique_code)
                 st.session_state.unique_code = unique_code
 
                 # Collect session data after setting the unique code
@@ -32,13 +34,18 @@ def login_page(users,db):
                 #upload_message = upload_to_firebase(db, document_id, entry)
                 
                 # Navigate to the intake form page
-                st.session_state.page = "intake_form"  # Change to assessment page
+                advance("login")  # Next page in the flow
                 #st.success(upload_message)  # Show success message
                 st.session_state.document_id = unique_code
+
+                # One read of the student's document pre-fills every page of a resumed assessment
+                hydrate_student(db, unique_code)
                 st.rerun()  # Rerun to refresh the view
             else:
                 st.error("Invalid code. Please try again.")
         else:
             st.error("Please enter a code.")
 
-
+def main(db, document_id):
+    users = load_users()
+    login_page(users, db)
@@ -0,0 +1,141 @@
+# utils/matrix_assessment.py
+
+import zlib
+import streamlit as st
+
+NUM_ROWS = 5  # Every matrix page asks for up to 5 items
+MATRIX_FORMAT = 2  # Version of the compact stored layout written by encode_matrix
+GRID_FRAGMENT = "matrix_grid"  # Fragment key the diagnosis sidebar reruns when the order changes
+
+def empty_matrix(num_rows=NUM_ROWS):
+    """A matrix is the row labels plus one column of assessments per diagnosis."""
+    return {"rows": [""] * num_rows, "values": {}}
+
+def matrix_from_entries(entries, row_field, value_field, num_rows=NUM_ROWS):
+    """Build a matrix from the stored {diagnosis: [{row_field, value_field}, ...]} layout."""
+    matrix = empty_matrix(num_rows)
+    for diagnosis, items in (entries or {}).items():
+        column = [""] * num_rows
+        for i, item in enumerate(items[:num_rows]):
+            if item.get(row_field) and not matrix["rows"][i]:
+                matrix["rows"][i] = item[row_field]
+            column[i] = item.get(value_field) or ""
+        matrix["values"][diagnosis] = column
+    return matrix
+
+def matrix_to_entries(matrix, diagnoses, row_field, value_field):
+    """Inverse of matrix_from_entries, for the diagnoses currently on the page."""
+    entries = {}
+    for diagnosis in diagnoses:
+        column = matrix["values"].get(diagnosis, [""] * len(matrix["rows"]))
+        entries[diagnosis] = [
+            {row_field: row, value_field: value} for row, value in zip(matrix["rows"], column)
+        ]
+    return entries
+
+def encode_matrix(matrix, diagnoses, assessment_options):
+    """Compact stored form of a matrix, for the diagnoses currently on the page.
+
+    Row labels, the diagnosis order and the assessment options are stored once, and each cell is
+    an integer: 0 for blank, k for options[k - 1]. Firestore does not allow nested arrays, so
+    codes is flat and diagnosis-major: row i under diagnoses[j] is codes[j * len(rows) + i].
+    Upload it with the field in upload_to_firebase's replace, so a legacy map stored under the
+    same field is overwritten rather than merged into.
+    """
+    options = [option for option in assessment_options if option]
+    code_of = {option: code for code, option in enumerate(options, 1)}
+    rows = list(matrix["rows"])
+    codes = []
+    for diagnosis in diagnoses:
+        column = matrix["values"].get(diagnosis, [""] * len(rows))
+        codes += [code_of.get(value, 0) for value in column]
+    return {"format": MATRIX_FORMAT, "rows": rows, "diagnoses": list(diagnoses), "options": options, "codes": codes}
+
+def decode_matrix(stored):
+    """Inverse of encode_matrix."""
+    rows = list(stored["rows"])
+    options = stored["options"]
+    codes = stored["codes"]
+    values = {}
+    for j, diagnosis in enumerate(stored["diagnoses"]):
+        column = codes[j * len(rows):(j + 1) * len(rows)]
+        values[diagnosis] = [options[code - 1] if 0 < code <= len(options) else "" for code in column]
+    return {"rows": rows, "values": values}
+
+def is_compact(stored):
+    return isinstance(stored, dict) and stored.get("format") == MATRIX_FORMAT
+
+def load_matrix(stored, row_field, value_field, num_rows=NUM_ROWS):
+    """Read a stored matrix in either layout.
+
+    Documents written before MATRIX_FORMAT hold {diagnosis: [{row_field, value_field}, ...]};
+    row_field and value_field are only used to read those.
+    """
+    if is_compact(stored):
+        return decode_matrix(stored)
+    return matrix_from_entries(stored, row_field, value_field, num_rows)
+
+def matrix_assessment(key, row_label, diagnoses, assessment_options, row_options=None, initial=None):
+    """Render the assessment grid as one editable table and return the current matrix.
+
+    The first column holds the row label, free text or, with row_options, a choice from that list.
+    Each diagnosis gets a column choosing one of assessment_options. initial (a matrix, or a
+    function returning one) is only used the first time the page renders in a session; after
+    that the edited matrix lives in session state under key, so it survives reruns and
+    diagnosis reorders.
+
+    The grid is a fragment (GRID_FRAGMENT), so editing a cell reruns only the grid. diagnoses
+    should be st.session_state.diagnoses itself: the sidebar reorders that list in place and
+    reruns the fragment, which picks up the new order without a full app rerun.
+    """
+    state_key = f"{key}_matrix"
+    if state_key not in st.session_state:
+        if callable(initial):
+            initial = initial()
+        st.session_state[state_key] = initial or empty_matrix()
+    _matrix_grid(key, row_label, diagnoses, assessment_options, row_options)
+    return st.session_state[state_key]
+
+@st.fragment(key=GRID_FRAGMENT)
+def _matrix_grid(key, row_label, diagnoses, assessment_options, row_options):
+    state_key = f"{key}_matrix"
+    matrix = st.session_state[state_key]
+
+    column_ids = [f"dx_{j}" for j in range(len(diagnoses))]
+    data = [
+        {"item": row or None, **{
+            column_id: matrix["values"].get(diagnosis, [""] * len(matrix["rows"]))[i] or None
+            for column_id, diagnosis in zip(column_ids, diagnoses)
+        }}
+        for i, row in enumerate(matrix["rows"])
+    ]
+
+    if row_options is None:
+        item_column = st.column_config.TextColumn(row_label)
+    else:
+        item_column = st.column_config.SelectboxColumn(row_label, options=[option for option in row_options if option])
+    column_config = {"item": item_column}
+    for column_id, diagnosis in zip(column_ids, diagnoses):
+        column_config[column_id] = st.column_config.SelectboxColumn(
+            diagnosis or " ", options=[option for option in assessment_options if option]
+        )
+
+    # Columns are positional, so a new diagnosis order needs a fresh editor seeded from the matrix
+    order = zlib.crc32("\0".join(diagnoses).encode())
+    edited = st.data_editor(
+        data,
+        column_config=column_config,
+        column_order=["item"] + column_ids,
+        num_rows="fixed",
+        hide_index=True,
+        width="stretch",
+        key=f"{key}_editor_{order:08x}",
+    )
+
+    matrix = {
+        "rows": [(row.get("item") or "").strip() for row in edited],
+        "values": dict(matrix["values"]),
+    }
+    for column_id, diagnosis in zip(column_ids, diagnoses):
+        matrix["values"][diagnosis] = [row.get(column_id) or "" for row in edited]
+    st.session_state[state_key] = matrix
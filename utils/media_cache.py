@@ -0,0 +1,125 @@
+# utils/media_cache.py
+
+import os
+import hashlib
+import logging
+import threading
+from utils.case_bundle import CASE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Where resized copies of case images are kept; safe to delete, they are rebuilt on demand
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join(CASE_DIR, ".media_cache"))
+DERIVATIVE_WIDTHS = (480, 960, 1600)  # Pixel widths precomputed for every image
+DISPLAY_WIDTH = 960  # Main column width at 1x plus headroom for hi-dpi screens
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff'}
+
+_hashes = {}  # (path, mtime_ns, size) -> sha256 of the file, so originals are only hashed once
+_hashes_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+def content_hash(path):
+    """Return the sha256 of a file, cached by its path, mtime and size."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _hashes_lock:
+        if key in _hashes:
+            return _hashes[key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+
+    with _hashes_lock:
+        _hashes[key] = digest.hexdigest()
+        return _hashes[key]
+
+def _output_format(image):
+    from PIL import features
+
+    if features.check("webp"):
+        return "WEBP", ".webp"
+    if image.mode in ("RGBA", "LA", "P"):
+        return "PNG", ".png"  # Keep transparency when WebP is not available
+    return "JPEG", ".jpg"
+
+def _derivative_width(original_width, width):
+    return min(original_width, width)  # Never upscale
+
+def _derivative_path(path, digest, width, suffix):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(MEDIA_CACHE_DIR, f"{stem}.{digest[:16]}.{width}{suffix}")
+
+def _write_derivative(image, width, out_format, out_path):
+    from PIL import Image
+
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+    if out_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    elif image.mode == "P":
+        image = image.convert("RGBA")
+
+    options = {"WEBP": {"quality": WEBP_QUALITY, "method": 6}, "JPEG": {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}}
+    tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    image.save(tmp_path, out_format, **options.get(out_format, {"optimize": True}))
+    os.replace(tmp_path, out_path)
+
+def build_derivatives(path, widths=DERIVATIVE_WIDTHS):
+    """Write every width of an image into the cache. Returns {width: derivative path}."""
+    from PIL import Image
+
+    digest = content_hash(path)
+    with Image.open(path) as image:
+        image.load()
+        out_format, suffix = _output_format(image)
+        derivatives = {}
+        for width in widths:
+            out_path = _derivative_path(path, digest, _derivative_width(image.width, width), suffix)
+            if not os.path.exists(out_path):
+                os.makedirs(MEDIA_CACHE_DIR, exist_ok=True)
+                _write_derivative(image, _derivative_width(image.width, width), out_format, out_path)
+            derivatives[width] = out_path
+    return derivatives
+
+_variants = {}  # (content hash, width) -> derivative path
+
+def image_variant(path, width=DISPLAY_WIDTH):
+    """Return the cached derivative of path to show at width pixels, building it on first use.
+
+    The smallest precomputed width that covers the request is used. If the image cannot be
+    converted (no Pillow, unreadable file, read-only cache) the original path is returned.
+    """
+    width = next((size for size in sorted(DERIVATIVE_WIDTHS) if size >= width), max(DERIVATIVE_WIDTHS))
+    try:
+        key = (content_hash(path), width)
+        variant = _variants.get(key)
+        if variant is None or not os.path.exists(variant):
+            with _write_lock:  # One session builds the cache while the others wait for it
+                variant = _variants.get(key)
+                if variant is None or not os.path.exists(variant):
+                    variant = build_derivatives(path)[width]
+                    _variants[key] = variant
+        return variant
+    except Exception as e:
+        logger.warning(f"Could not build a display copy of {path}: {e}")
+        return path
+
+def precompute_derivatives(case_dir=CASE_DIR):
+    """Build derivatives for every image in case_dir. Returns the number of images processed."""
+    count = 0
+    for name in sorted(os.listdir(case_dir)):
+        path = os.path.join(case_dir, name)
+        if os.path.isfile(path) and os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+            build_derivatives(path)
+            count += 1
+    return count
+
+if __name__ == "__main__":
+    # Precompute image derivatives, e.g. as a deploy step: python -m utils.media_cache
+    count = precompute_derivatives()
+    print(f"Built derivatives for {count} images in {MEDIA_CACHE_DIR}")
@@ -0,0 +1,101 @@
+# utils/media_manifest.py
+
+import os
+import time
+import mimetypes
+import threading
+from collections import namedtuple
+from utils.case_bundle import CASE_DIR, CHECK_INTERVAL
+
+# Media kind -> extensions in order of preference, matched case-insensitively
+MEDIA_EXTENSIONS = {
+    "image": ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff'],
+    "audio": ['.mp3', '.wav', '.ogg', '.flac'],
+    "video": ['.mp4', '.mov', '.avi', '.mkv'],
+}
+
+class MediaAsset(namedtuple("MediaAsset", ["name", "path", "kind", "mime_type", "size", "mtime_ns"])):
+    __slots__ = ()
+
+    @property
+    def version(self):
+        """Token that changes whenever the file does, taken from its size and mtime so nothing is read."""
+        return f"{self.size:x}-{self.mtime_ns:x}"
+
+_EXTENSION_KINDS = {
+    ext: (kind, rank) for kind, extensions in MEDIA_EXTENSIONS.items() for rank, ext in enumerate(extensions)
+}
+
+def media_name(label):
+    """Logical asset name for a label such as a result from results.txt ("Chest X-ray" -> "Chest_X-ray")."""
+    return label.replace(" ", "_")
+
+class MediaManifest:
+    """Every media file of a case, found with one directory scan.
+
+    Assets are keyed by (logical name, kind), where the logical name is the file name without its
+    extension (image_1, audio_1, Complete_Blood_Count). When a name has several files of the same
+    kind the preferred extension wins. Only the media files are stat'ed and none are read, so
+    building a manifest is cheap even for a case with long videos.
+    """
+
+    def __init__(self, case_dir=CASE_DIR):
+        self.case_dir = case_dir
+        self.assets = {}
+        ranks = {}
+        with os.scandir(case_dir) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                kind_rank = _EXTENSION_KINDS.get(ext.lower())
+                if kind_rank is None or not entry.is_file():
+                    continue
+                kind, rank = kind_rank
+                if rank < ranks.get((name, kind), len(MEDIA_EXTENSIONS[kind])):
+                    ranks[(name, kind)] = rank
+                    self.assets[(name, kind)] = entry
+
+        for key, entry in self.assets.items():
+            name, kind = key
+            mime_type = mimetypes.guess_type(entry.name)[0] or "application/octet-stream"
+            stat = entry.stat()
+            self.assets[key] = MediaAsset(name, entry.path, kind, mime_type, stat.st_size, stat.st_mtime_ns)
+
+    def __len__(self):
+        return len(self.assets)
+
+    def get(self, name, kind):
+        """Return the MediaAsset for a logical name, or None if the case has no such file."""
+        return self.assets.get((name, kind))
+
+_manifest = None
+_manifest_checked_at = 0.0
+_manifest_lock = threading.Lock()
+
+def get_media_manifest(case_dir=CASE_DIR):
+    """Return the manifest shared by every session in this process.
+
+    case_dir is rescanned at most every CHECK_INTERVAL seconds, and the shared manifest is only
+    replaced when a media file was added, removed or changed. Other files in case_dir (the case
+    bundle, the write journal, .media_cache/) do not matter.
+    """
+    global _manifest, _manifest_checked_at
+
+    now = time.monotonic()
+    if _manifest is not None and now - _manifest_checked_at < CHECK_INTERVAL:
+        return _manifest
+
+    with _manifest_lock:
+        if _manifest is not None and now - _manifest_checked_at < CHECK_INTERVAL:
+            return _manifest
+
+        manifest = MediaManifest(case_dir)
+        if _manifest is None or manifest.case_dir != _manifest.case_dir or manifest.assets != _manifest.assets:
+            _manifest = manifest
+
+        _manifest_checked_at = now
+        return _manifest
+
+if __name__ == "__main__":
+    # List the case's media: python -m utils.media_manifest
+    for asset in sorted(get_media_manifest().assets.values()):
+        print(f"{asset.name:30} {asset.kind:6} {asset.mime_type:20} {asset.size:>10} {asset.version:>20}  {asset.path}")
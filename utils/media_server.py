@@ -0,0 +1,195 @@
+# utils/media_server.py
+
+import os
+import re
+import logging
+import mimetypes
+import threading
+import urllib.request
+from urllib.parse import quote, unquote, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.media_manifest import get_media_manifest
+from utils.tile_pyramid import TILE_DIR
+
+logger = logging.getLogger(__name__)
+
+# The media server listens on localhost; a reverse proxy on the app's own origin forwards to it
+MEDIA_HOST = os.getenv("MEDIA_HOST", "127.0.0.1")
+MEDIA_PORT = int(os.getenv("MEDIA_PORT", "8502"))
+# Absolute URL browsers reach the server at, e.g. "https://exam.example.org/case-media". Left unset,
+# nothing is served separately and pages embed media through Streamlit as before.
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "").rstrip("/")
+PROBE_TIMEOUT = 2.0  # Seconds to wait for the server to answer at MEDIA_BASE_URL
+CACHE_MAX_AGE = 365 * 24 * 3600  # Asset URLs contain the file's version and tile keys its content hash, so responses never change
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+def media_url(asset):
+    """URL the browser streams asset from. The version in the path makes it safe to cache forever."""
+    return f"{MEDIA_BASE_URL}/media/{asset.version}/{quote(os.path.basename(asset.path))}"
+
+def tiles_url(key):
+    """URL of the Deep Zoom descriptor for the pyramid stored under TILE_DIR/key."""
+    return f"{MEDIA_BASE_URL}/tiles/{key}/image.dzi"
+
+def _find_asset(version, filename):
+    for asset in get_media_manifest().assets.values():
+        if asset.version == version and os.path.basename(asset.path) == filename:
+            return asset
+    return None
+
+def parse_range(header, size):
+    """Return (start, end) inclusive for a single "bytes=" range, None for the whole file.
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or size == 0:
+        raise ValueError(header)
+    first, last = match.groups()
+    if not first:  # "bytes=-500" is the last 500 bytes
+        if not last or int(last) == 0:
+            raise ValueError(header)
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        raise ValueError(header)
+    return start, end
+
+class MediaRequestHandler(BaseHTTPRequestHandler):
+    """Serves manifest assets and image tiles only, with Range support, so players can seek without the whole file."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        parts = self.path.split("?", 1)[0].split("/", 3)
+        if parts[1:] == ["healthz"]:
+            self.send_response(204)
+            self.end_headers()
+            return
+        if len(parts) == 4 and parts[1] == "media":
+            asset = _find_asset(parts[2], unquote(parts[3]))
+            if asset:
+                self._send_file(asset.path, asset.mime_type, f'"{asset.version}"', send_body)
+                return
+        elif len(parts) == 4 and parts[1] == "tiles":
+            # Tiles are addressed by pyramid key, which is a content hash, so they are immutable too
+            root = os.path.realpath(os.path.join(TILE_DIR, parts[2]))
+            path = os.path.realpath(os.path.join(root, unquote(parts[3])))
+            if os.path.dirname(root) == os.path.realpath(TILE_DIR) and path.startswith(root + os.sep):
+                mime_type = "application/xml" if path.endswith(".dzi") else mimetypes.guess_type(path)[0] or "application/octet-stream"
+                self._send_file(path, mime_type, f'"{parts[2]}-{parts[3]}"', send_body)
+                return
+        self.send_error(404)
+
+    def _send_file(self, path, mime_type, etag, send_body):
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        try:
+            file = open(path, 'rb')
+        except OSError:
+            self.send_error(404)
+            return
+
+        with file:
+            size = os.fstat(file.fileno()).st_size
+            try:
+                byte_range = parse_range(self.headers.get("Range"), size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            start, end = byte_range or (0, size - 1)
+            length = max(0, end - start + 1)
+            self.send_response(206 if byte_range else 200)
+            if byte_range:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Type", mime_type)
+            self.send_header("Content-Length", str(length))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"public, max-age={CACHE_MAX_AGE}, immutable")
+            self.send_header("Access-Control-Allow-Origin", "*")  # The zoom viewer fetches descriptors from the app's origin
+            self.end_headers()
+            self.wfile.flush()
+
+            if send_body and length:
+                # sendfile copies straight from the page cache to the socket
+                self.connection.sendfile(file, offset=start, count=length)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_media_server():
+    """Start the media server in a daemon thread, once per process."""
+    global _server
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((MEDIA_HOST, MEDIA_PORT), MediaRequestHandler)
+        except OSError as e:
+            # Another worker on this host already serves the same case directory
+            logger.info(f"Media server not started on port {MEDIA_PORT}: {e}")
+            _server = False
+            return _server
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="media-server", daemon=True).start()
+        logger.info(f"Serving case media on {MEDIA_HOST}:{MEDIA_PORT}")
+        return _server
+
+def _origin(url):
+    parts = urlsplit(url)
+    return parts.scheme.lower(), parts.netloc.lower()
+
+def _probe():
+    try:
+        with urllib.request.urlopen(f"{MEDIA_BASE_URL}/healthz", timeout=PROBE_TIMEOUT) as response:
+            return response.status < 300
+    except Exception as e:
+        logger.warning(f"Media server is not reachable at {MEDIA_BASE_URL}, embedding media directly: {e}")
+        return False
+
+_reachable = None
+
+def media_server_available(app_url):
+    """True if pages at app_url can load media from MEDIA_BASE_URL; starts the server on first use.
+
+    Requires MEDIA_BASE_URL to be set, on the same origin as the app (so there is no extra port,
+    CORS or mixed content), and answering through it. Reachability is checked once per process.
+    """
+    global _reachable
+
+    if not MEDIA_BASE_URL or not app_url or _origin(MEDIA_BASE_URL) != _origin(app_url):
+        return False
+    if _reachable is None:
+        start_media_server()
+        _reachable = _probe()
+    return _reachable
+
+if __name__ == "__main__":
+    # Run the media server on its own: python -m utils.media_server
+    logging.basicConfig(level=logging.INFO)
+    server = ThreadingHTTPServer((MEDIA_HOST, MEDIA_PORT), MediaRequestHandler)
+    print(f"Serving case media on {MEDIA_HOST}:{MEDIA_PORT}")
+    server.serve_forever()
@@ -0,0 +1,132 @@
+# utils/page_registry.py
+
+import time
+import logging
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from utils.case_bundle import get_case_bundle
+
+logger = logging.getLogger(__name__)
+
+# Page name -> (module, function, whether it takes (db, document_id)).
+# Modules are imported the first time their page is routed to, not at app startup.
+PAGES = {
+    "welcome": ("utils.welcome", "welcome_page", False),
+    "login": ("utils.login", "main", True),
+    "intake_form": ("utils.intake_form", "display_intake_form", True),
+    "diagnoses": ("utils.diagnoses", "display_diagnoses", True),
+    "Intervention Entry": ("utils.intervention_entry", "main", True),
+    "History with AI": ("utils.history_with_ai", "run_virtual_patient", True),
+    "Focused Physical Examination": ("utils.focused_physical_examination", "display_focused_physical_examination", True),
+    "Physical Examination Components": ("utils.physical_examination", "main", False),
+    "History Illness Script": ("utils.history_illness_script", "main", True),
+    "Physical Examination Features": ("utils.physical_examination_features", "display_physical_examination_features", True),
+    "Laboratory Tests": ("utils.lab_tests", "display_laboratory_tests", True),
+    "Radiology Tests": ("utils.radtests", "display_radiological_tests", True),
+    "Other Tests": ("utils.othertests", "display_other_tests", True),
+    "Results": ("utils.results", "display_results_image", False),
+    "Laboratory Features": ("utils.laboratory_features", "display_laboratory_features", True),
+    "Simple Success": ("utils.simple_success1", "main", True),
+}
+
+# The assessment flow: page name -> pages a student can go to next, in order of preference
+FLOW = {
+    "welcome": ["login"],
+    "login": ["intake_form"],
+    "intake_form": ["diagnoses"],
+    "diagnoses": ["Intervention Entry"],
+    "Intervention Entry": ["History with AI"],
+    "History with AI": ["Focused Physical Examination"],
+    "Focused Physical Examination": ["Physical Examination Components"],
+    "Physical Examination Components": ["History Illness Script"],
+    "History Illness Script": ["Physical Examination Features"],
+    "Physical Examination Features": ["Laboratory Tests"],
+    "Laboratory Tests": ["Radiology Tests"],
+    "Radiology Tests": ["Other Tests"],
+    "Other Tests": ["Results"],
+    "Results": ["Laboratory Features"],
+    "Laboratory Features": ["Simple Success"],
+    "Simple Success": [],
+}
+
+PREFETCH_WORKERS = 2
+
+_prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="page-prefetch")
+_prefetched = {}  # (page, case bundle version) -> future, so each page is warmed once per case
+_prefetch_lock = threading.Lock()
+
+# Page name -> timing stats, shared by every session in this process
+PAGE_TIMINGS = {}
+
+def _timings(page):
+    return PAGE_TIMINGS.setdefault(page, {"import_seconds": None, "renders": 0, "render_seconds_total": 0.0, "last_render_seconds": None})
+
+def load_page(page):
+    """Return the render function for a page, importing its module on first use."""
+    module_name, function_name, _ = PAGES[page]
+    stats = _timings(page)
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)  # Cached in sys.modules after the first call
+    if stats["import_seconds"] is None:
+        stats["import_seconds"] = time.perf_counter() - start
+        logger.info(f"Imported page '{page}' ({module_name}) in {stats['import_seconds'] * 1000:.1f} ms")
+
+    return getattr(module, function_name)
+
+def next_page(page):
+    """The page that follows page in FLOW."""
+    return FLOW[page][0]
+
+def advance(page):
+    """Move the session from page to the next page in FLOW. The caller reruns."""
+    st.session_state.page = next_page(page)
+
+def _warm_page(page):
+    # Everything here is shared by all sessions, so it is safe to build off the script thread
+    get_case_bundle()
+    module = importlib.import_module(PAGES[page][0])
+    prefetch = getattr(module, "prefetch", None)  # Optional hook: catalogues, indexes, media
+    if prefetch is not None:
+        prefetch()
+
+def _prefetch_done(key, future):
+    if future.exception() is not None:
+        logger.warning(f"Prefetching page '{key[0]}' failed: {future.exception()}")
+        with _prefetch_lock:
+            _prefetched.pop(key, None)  # Try again on a later render
+
+def prefetch_next_pages(page):
+    """Warm the caches the pages after page will read, in the background. Never blocks the render."""
+    version = get_case_bundle().version
+    with _prefetch_lock:
+        for upcoming in FLOW.get(page, []):
+            key = (upcoming, version)
+            if key not in _prefetched and upcoming in PAGES:
+                _prefetched[key] = _prefetch_executor.submit(_warm_page, upcoming)
+                _prefetched[key].add_done_callback(lambda future, key=key: _prefetch_done(key, future))
+
+def render_page(page, db, document_id):
+    """Render a page by name. Returns False if the page is not registered."""
+    if page not in PAGES:
+        return False
+
+    render = load_page(page)
+    prefetch_next_pages(page)  # While the student works on this page
+    stats = _timings(page)
+
+    start = time.perf_counter()
+    try:
+        if PAGES[page][2]:
+            render(db, document_id)
+        else:
+            render()
+    finally:
+        # st.rerun() raises out of the page, so record the time either way
+        elapsed = time.perf_counter() - start
+        stats["renders"] += 1
+        stats["render_seconds_total"] += elapsed
+        stats["last_render_seconds"] = elapsed
+    return True
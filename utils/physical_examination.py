@@ -1,22 +1,22 @@
 import streamlit as st
-import os
-
-# Load physical examination text from a file
-def load_phys_exam_data(file_path):
-    try:
-        with open(file_path, 'r') as file:
-            return file.read()
-    except FileNotFoundError:
-        st.error(f"File not found: {file_path}. Please check the file path.")
-        return ""
+from utils.case_bundle import get_case_bundle
+from utils.media_cache import image_variant
+from utils.media_manifest import get_media_manifest
+from utils.media_server import media_server_available, media_url
+from utils.page_registry import advance
+
+def prefetch():
+    """Scan the case media and resize the exam image before the student reaches this page."""
+    asset = get_media_manifest().get("image_1", "image")
+    if asset:
+        image_variant(asset.path)
 
 # Function to display selected examination component text
 def display_selected_component(selected_component):
     if selected_component:
-        text = load_phys_exam_data("phys_exam.txt")
+        component_texts = get_case_bundle().phys_exam  # Sections were split on double newlines when compiled
         
-        if text:
-            component_texts = text.split('\n\n')  # Assuming sections are separated by double newlines
+        if component_texts:
             for component_text in component_texts:
                 if selected_component.lower() in component_text.lower():
                     # Extract text after the first colon
@@ -28,47 +28,32 @@ def display_selected_component(selected_component):
 
 # Function to check and display an image if present
 def display_image(base_image_name):
-    image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.PNG', '.JPG', '.JPEG', '.GIF', '.BMP', '.TIFF']
-    image_found = False
-
-    for ext in image_extensions:
-        image_path = f"{base_image_name}{ext}"
-        if os.path.isfile(image_path):
-            st.image(image_path, caption="Image interpretation required.", use_column_width=True)
-            image_found = True
-            break  # Exit loop if an image is found
-
-    if not image_found:
+    asset = get_media_manifest().get(base_image_name, "image")
+    if asset:
+        st.image(image_variant(asset.path), caption="Image interpretation required.", width="stretch")  # Resized copy, not the original
+    else:
         st.write("No images are available.")
 
 # Function to check and display audio if present
 def display_audio(base_audio_name):
-    audio_extensions = ['.mp3', '.wav', '.ogg', '.flac', '.MP3', '.WAV', '.OGG', '.FLAC']
-    audio_found = False
-
-    for ext in audio_extensions:
-        audio_path = f"{base_audio_name}{ext}"
-        if os.path.isfile(audio_path):
-            st.audio(audio_path)
-            audio_found = True
-            break  # Exit loop if an audio file is found
-
-    if not audio_found:
+    asset = get_media_manifest().get(base_audio_name, "audio")
+    if asset:
+        if media_server_available(st.context.url):
+            st.audio(media_url(asset), format=asset.mime_type)  # Streamed with range requests, not loaded into memory
+        else:
+            st.audio(asset.path, format=asset.mime_type)
+    else:
         st.write("No audio is available.")
 
 # Function to check and display video if present
 def display_video(base_video_name):
-    video_extensions = ['.mp4', '.mov', '.avi', '.mkv', '.MP4', '.MOV', '.AVI', '.MKV']
-    video_found = False
-
-    for ext in video_extensions:
-        video_path = f"{base_video_name}{ext}"
-        if os.path.isfile(video_path):
-            st.video(video_path)
-            video_found = True
-            break  # Exit loop if a video file is found
-
-    if not video_found:
+    asset = get_media_manifest().get(base_video_name, "video")
+    if asset:
+        if media_server_available(st.context.url):
+            st.video(media_url(asset), format=asset.mime_type)  # Streamed with range requests, not loaded into memory
+        else:
+            st.video(asset.path, format=asset.mime_type)
+    else:
         st.write("No video is available.")
 
 # Main Streamlit app function
@@ -103,7 +88,7 @@ def main():
 
     # Add a submit button to go to the next page
     if st.button("Next",key="pe_submit_button"):
-        st.session_state.page = "History Illness Script"  # Change to your actual next page
+        advance("Physical Examination Components")  # Next page in the flow
         st.rerun()  # Rerun the app to reflect the changes
 
 if __name__ == '__main__':
@@ -0,0 +1,100 @@
+# utils/provision.py
+
+import os
+import csv
+import sys
+import secrets
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from utils import firebase_operations
+from utils.firebase_operations import MAX_BATCH_SIZE, initialize_firebase
+from utils.roster import ROSTER_FILE, Roster
+
+CODE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"  # No 0/O, 1/I/L, so codes read back unambiguously
+CODE_LENGTH = 6
+WRITE_WORKERS = 8  # Batches committed at the same time
+
+def read_names(path):
+    """Students to provision from a CSV with a "name" column and an optional "code" column."""
+    with open(path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    if rows and "name" not in rows[0]:
+        raise ValueError(f"{path} needs a 'name' column")
+    return [((row.get("code") or "").strip(), row["name"].strip()) for row in rows if (row.get("name") or "").strip()]
+
+def generate_codes(count, taken=()):
+    """Return count new codes that are unique and not in taken."""
+    taken = set(taken)
+    codes = []
+    while len(codes) < count:
+        code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+        if code not in taken:
+            taken.add(code)
+            codes.append(code)
+    return codes
+
+def assign_codes(students, existing):
+    """Give every (code, name) without a code a fresh one. Returns [(code, name)]."""
+    taken = {code for code, _ in students if code} | set(existing)
+    new_codes = iter(generate_codes(sum(1 for code, _ in students if not code), taken))
+    return [(code or next(new_codes), name) for code, name in students]
+
+def skeleton_document(code, name):
+    """The fields login would otherwise write on the student's first submit."""
+    return {"unique_code": code, "user_name": name}
+
+def write_documents(store, collection_name, students, workers=WRITE_WORKERS):
+    """Create a skeleton document per student, in parallel batches of up to MAX_BATCH_SIZE."""
+    writes = [((collection_name, code), skeleton_document(code, name)) for code, name in students]
+    batches = [writes[start:start + MAX_BATCH_SIZE] for start in range(0, len(writes), MAX_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(store.set_many, batches):  # Re-raises the first failed batch
+            pass
+    return len(batches)
+
+def _write_csv(path, header, rows):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create student codes and documents ahead of an exam.")
+    parser.add_argument("names", help="CSV with a 'name' column (and optionally 'code')")
+    parser.add_argument("--roster", default=ROSTER_FILE, help="login roster to add the students to")
+    parser.add_argument("--sheet", default="codes.csv", help="where to write the name,code sheet to hand out")
+    parser.add_argument("--workers", type=int, default=WRITE_WORKERS, help="batches written in parallel")
+    parser.add_argument("--dry-run", action="store_true", help="assign codes and write files, but no documents")
+    args = parser.parse_args(argv)
+
+    store = None
+    if not args.dry_run:
+        store = initialize_firebase()
+        if not firebase_operations.FIREBASE_COLLECTION_NAME:
+            raise SystemExit("FIREBASE_COLLECTION_NAME is not set; set it in the environment or Streamlit secrets")
+
+    existing = []
+    if os.path.exists(args.roster):
+        with open(args.roster, newline='') as file:
+            existing = [(row.get("code") or "", row.get("name") or "") for row in csv.DictReader(file)]
+    roster = Roster(existing)
+
+    students = assign_codes(read_names(args.names), [code for code, _ in existing])
+    clashes = [code for code, name in students if code in roster and roster.name(code) != name]
+    if clashes:
+        raise SystemExit(f"Codes already belong to other students: {', '.join(clashes)}")
+
+    if store is not None:
+        batches = write_documents(store, firebase_operations.FIREBASE_COLLECTION_NAME, students, args.workers)
+        print(f"Created {len(students)} documents in {batches} batches")
+
+    new_rows = [(code, name) for code, name in students if code not in roster]
+    _write_csv(args.roster, ["code", "name"], [row for row in existing if row[0]] + new_rows)
+    _write_csv(args.sheet, ["name", "code"], [(name, code) for code, name in students])
+    print(f"Added {len(new_rows)} students to {args.roster}; code sheet written to {args.sheet}")
+
+if __name__ == "__main__":
+    # python -m utils.provision cohort.csv --sheet cohort_codes.csv
+    sys.exit(main())
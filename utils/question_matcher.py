@@ -0,0 +1,97 @@
+# utils/question_matcher.py
+
+import re
+import zlib
+import threading
+import numpy as np
+from utils.case_bundle import get_case_bundle
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Function words that every history question shares; they would otherwise decide the match
+STOP_WORDS = frozenset("""
+a about an and any are as at be been by can could did do does doing for from had has have how i if in is it
+its me my of on or so that the there this to was we were what when where which who why will with would you
+your you're yourself
+""".split())
+
+def _stem(word):
+    # Just enough to make "fevers" and "fever" the same feature
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def _features(text):
+    """Content words, word pairs and character trigrams of a question."""
+    words = [_stem(word) for word in _WORD_RE.findall(text.lower()) if word not in STOP_WORDS]
+    features = list(words)
+    features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return features
+
+class QuestionMatcher:
+    """Offline retrieval over a case's question bank.
+
+    Every question is turned into a TF-IDF vector over hashed word and character n-grams, and the
+    rows are L2-normalized once. Matching a student's question is then a single matrix-vector
+    product (cosine similarity against every question) and an argmax.
+    """
+
+    N_FEATURES = 2 ** 11  # Hashed dimensions; 2,048 float32 columns = 8 KB per question
+    THRESHOLD = 0.35  # Minimum cosine similarity to count as the same question
+
+    def __init__(self, question_bank):
+        self.questions = list(question_bank)
+        self.answers = [question_bank[question] for question in self.questions]
+
+        counts = np.zeros((len(self.questions), self.N_FEATURES), dtype=np.float32)
+        for row, question in enumerate(self.questions):
+            self._add_counts(counts[row], question)
+
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(self.questions)) / (1 + document_frequency)) + 1).astype(np.float32)
+        self.matrix = self._normalize(counts * self.idf)
+
+    def _add_counts(self, vector, text):
+        for feature in _features(text):
+            h = zlib.crc32(feature.encode())
+            # The sign bit keeps hash collisions from always adding up
+            vector[h % self.N_FEATURES] += 1.0 if h & 0x80000000 else -1.0
+
+    def _normalize(self, matrix):
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def vectorize(self, text):
+        vector = np.zeros(self.N_FEATURES, dtype=np.float32)
+        self._add_counts(vector, text)
+        return self._normalize(vector * self.idf)
+
+    def match(self, text):
+        """Return (question, answer, similarity) for the closest question, or None below THRESHOLD."""
+        if not self.questions:
+            return None
+        scores = self.matrix @ self.vectorize(text)
+        best = int(np.argmax(scores))
+        if scores[best] < self.THRESHOLD:
+            return None
+        return self.questions[best], self.answers[best], float(scores[best])
+
+_matcher = None
+_matcher_version = None
+_matcher_lock = threading.Lock()
+
+def get_question_matcher():
+    """Return the matcher for the current case bundle, shared by every session in this process."""
+    global _matcher, _matcher_version
+
+    case = get_case_bundle()
+    if _matcher_version != case.version:
+        with _matcher_lock:
+            if _matcher_version != case.version:
+                _matcher = QuestionMatcher(case.question_bank)
+                _matcher_version = case.version
+    return _matcher
@@ -1,48 +1,46 @@
 # utils.py
 
 import streamlit as st
-import os
-import requests
-
-def read_results_from_file():
-    try:
-        with open('results.txt', 'r') as file:
-            diagnoses = [line.strip() for line in file.readlines() if line.strip()]
-        return diagnoses
-    except Exception as e:
-        st.error(f"Error reading dx_list.txt: {e}")
-        return []
+from utils.case_bundle import get_case_bundle
+from utils.media_cache import image_variant
+from utils.media_manifest import get_media_manifest, media_name
+from utils.media_server import MEDIA_BASE_URL
+from utils.tile_pyramid import ensure_pyramid
+from utils.zoom_viewer import zoom_viewer
+from utils.page_registry import advance
+
+def prefetch():
+    """Resize (and, with the media server, tile) every result image before the student reaches this page."""
+    manifest = get_media_manifest()
+    for result in get_case_bundle().results:
+        asset = manifest.get(media_name(result), "image")
+        if asset:
+            image_variant(asset.path)
+            if MEDIA_BASE_URL:  # Tiles are only shown when the media server is exposed
+                ensure_pyramid(asset.path)
 
 def display_results_image():
     st.title("Results")
-    results = read_results_from_file()
-    
     # Insert a blank option at the start of the results list
-    results.insert(0, "")  # Add a blank option
+    results = [""] + list(get_case_bundle().results)  # Add a blank option
 
     # Create a dropdown in Streamlit for the user to select a result
     selected_result = st.selectbox("Select a result", results)
 
-    # Prepare the corresponding image file name
-    image_filename = selected_result.replace(" ", "_") if selected_result else ""  # Replace spaces with underscores only if selected_result is not blank
-    image_extensions = ['.jpg', '.jpeg', '.png', '.gif', 
-                       '.JPG', '.JPEG', '.PNG', '.GIF']  # Define possible extensions, including uppercase
-
-    # Look for the image file in the same directory
-    image_path = None
-    for ext in image_extensions:
-        potential_path = f"{image_filename}{ext}"
-        if os.path.exists(potential_path):
-            image_path = potential_path
-            break
+    # Look up the result's image in the case's media manifest
+    asset = get_media_manifest().get(media_name(selected_result), "image") if selected_result else None
 
     # Display the selected result and the image
-    if selected_result and image_path:  # Only show image if a valid result is selected
-        st.image(image_path, caption=selected_result, use_column_width=True)
+    if asset:  # Only show image if a valid result is selected
+        # Zoomable tiles, so detail is kept without sending the full-resolution image up front
+        if zoom_viewer(asset.path):
+            st.caption(selected_result)
+        else:
+            st.image(image_variant(asset.path), caption=selected_result, width="stretch")  # Resized copy, not the original
 
     # Add a button to go to the next page
     if st.button("Next Page",key="results_next_button"):
-        st.session_state.page = "Laboratory Features"  # Change to the Simple Success page
+        advance("Results")  # Next page in the flow
         st.rerun()  # Rerun to update the app
 
 
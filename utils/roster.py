@@ -0,0 +1,67 @@
+# utils/roster.py
+
+import os
+import csv
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+ROSTER_FILE = os.getenv("ROSTER_FILE", "users.txt")  # "code,name" CSV with a header row
+CHECK_INTERVAL = 2.0  # Seconds between mtime checks of the roster file
+
+class Roster:
+    """Student codes indexed for constant-time login lookups."""
+
+    def __init__(self, rows=()):
+        self._names = {}
+        for code, name in rows:
+            code = code.strip()
+            if code:
+                if code in self._names:
+                    logger.warning(f"Duplicate code in roster: {code}")
+                self._names[code] = name.strip()
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline='') as file:
+            reader = csv.DictReader(file)
+            return cls((row.get('code') or "", row.get('name') or "") for row in reader)
+
+    def __contains__(self, code):
+        return code in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def name(self, code):
+        """Return the student's name for code, or None if the code is not on the roster."""
+        return self._names.get(code)
+
+_roster = None
+_roster_path = None
+_roster_mtime = None
+_roster_checked_at = 0.0
+_roster_lock = threading.Lock()
+
+def get_roster(path=ROSTER_FILE):
+    """Return the roster shared by every session, re-read only when the file changes."""
+    global _roster, _roster_path, _roster_mtime, _roster_checked_at
+
+    now = time.monotonic()
+    if _roster is not None and _roster_path == path and now - _roster_checked_at < CHECK_INTERVAL:
+        return _roster
+
+    with _roster_lock:
+        if _roster is not None and _roster_path == path and now - _roster_checked_at < CHECK_INTERVAL:
+            return _roster
+
+        mtime = os.stat(path).st_mtime_ns
+        if _roster is None or _roster_path != path or mtime != _roster_mtime:
+            _roster = Roster.from_csv(path)
+            _roster_path, _roster_mtime = path, mtime
+            logger.info(f"Loaded roster of {len(_roster)} students from {path}")
+
+        _roster_checked_at = now
+        return _roster
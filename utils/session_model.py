@@ -0,0 +1,62 @@
+# utils/session_model.py
+
+import copy
+from dataclasses import dataclass, field, fields
+from utils.document_store import merge_entry
+
+@dataclass
+class StudentSession:
+    """Everything the pages pre-fill from the student's document, read once at login.
+
+    Field names match the document's keys. Keys the model does not know about are kept in
+    extra, so converting back with to_document() loses nothing.
+    """
+
+    document_id: str
+    unique_code: str = ""
+    user_name: str = ""
+    last_page: str = ""
+    vs_data: dict = field(default_factory=dict)  # Vital sign -> marked abnormal
+    diagnoses_s1: list = field(default_factory=list)  # Diagnosis order saved by each page
+    diagnoses_s2: list = field(default_factory=list)
+    diagnoses_s3: list = field(default_factory=list)
+    diagnoses_s4: list = field(default_factory=list)
+    diagnoses_s5: list = field(default_factory=list)
+    diagnoses_s6: list = field(default_factory=list)
+    diagnoses_s7: list = field(default_factory=list)
+    questions_asked: list = field(default_factory=list)  # Legacy transcript, moved into the "transcript" log on first read
+    responses: list = field(default_factory=list)
+    transcript_seq: int = 0  # Last event of the transcript log when the history session ended
+    transcript_migrated: bool = False  # questions_asked/responses have been copied into the log
+    excluded_exams: list = field(default_factory=list)
+    confirmed_exams: list = field(default_factory=list)
+    interventions: list = field(default_factory=list)
+    hxfeatures: dict = field(default_factory=dict)  # Assessment grids: diagnosis -> rows
+    pefeatures: dict = field(default_factory=dict)
+    laboratory_tests: dict = field(default_factory=dict)
+    radiological_tests: dict = field(default_factory=dict)
+    other_tests: dict = field(default_factory=dict)
+    assessments: dict = field(default_factory=dict)
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def document_fields(cls):
+        return [f.name for f in fields(cls) if f.name not in ("document_id", "extra")]
+
+    @classmethod
+    def from_document(cls, document_id, document):
+        document = copy.deepcopy(document or {})
+        known = {name: document.pop(name) for name in cls.document_fields() if document.get(name) is not None}
+        return cls(document_id=document_id, extra=document, **known)
+
+    def to_document(self):
+        document = copy.deepcopy(self.extra)
+        for name in self.document_fields():
+            document[name] = copy.deepcopy(getattr(self, name))
+        return document
+
+    def apply(self, entry, replace=()):
+        """Merge an uploaded entry into the model the same way Firestore merges it into the document."""
+        updated = StudentSession.from_document(self.document_id, merge_entry(self.to_document(), copy.deepcopy(entry), replace))
+        for name in self.document_fields() + ["extra"]:
+            setattr(self, name, getattr(updated, name))
@@ -1,4 +1,7 @@
 import streamlit as st
+from utils.firebase_operations import wait_for_uploads
+
+SAVE_TIMEOUT = 10  # Seconds to wait for the student's last answers before asking them to stay
 
 def display_simple_success1():
     st.title("Thank You for Your Participation!")
@@ -8,11 +11,20 @@ def display_simple_success1():
     Thank you once again for your contribution!
     """)
 
-def main():
+def main(db, document_id):
     display_simple_success1()  # Display the main message
 
+    # Make sure this student's queued answers have reached Firebase before they leave; checked
+    # once per session, and again on Submit only if they were still being written
+    if not st.session_state.get("uploads_confirmed"):
+        with st.spinner("Saving your answers..."):
+            st.session_state.uploads_confirmed = wait_for_uploads(document_id, SAVE_TIMEOUT)
+
+    if not st.session_state.uploads_confirmed:
+        st.warning("Your answers are still being saved. Please do not close this window and press Submit to check again.")
+
     # Place the Submit button at the bottom
-    if st.button("Submit"):
+    if st.button("Submit") and st.session_state.uploads_confirmed:
         st.success("Your submission was successful!")
         st.markdown("You can now close this window or navigate away. Thank you!")
 
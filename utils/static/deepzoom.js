@@ -0,0 +1,181 @@
+// utils/static/deepzoom.js
+//
+// Minimal Deep Zoom (.dzi) viewer: drag to pan, wheel or buttons to zoom. Only the tiles in view
+// at the level matching the current zoom are requested. Kept in the repo so the page needs no CDN.
+
+function DeepZoomViewer(container, dziUrl, options) {
+  options = options || {};
+  var maxPixelRatio = options.maxPixelRatio || 2;  // Furthest zoom, in screen pixels per image pixel
+  var ratio = window.devicePixelRatio || 1;
+  var baseUrl = dziUrl.replace(/\.dzi$/, "_files/");
+
+  var canvas = document.createElement("canvas");
+  canvas.style.width = "100%";
+  canvas.style.height = "100%";
+  canvas.style.cursor = "grab";
+  canvas.style.touchAction = "none";
+  container.appendChild(canvas);
+  var context = canvas.getContext("2d");
+
+  var image = null;  // {width, height, tileSize, overlap, format, maxLevel}
+  var tiles = {};  // "level/col_row" -> Image
+  var view = {scale: 1, x: 0, y: 0};  // Screen pixels per image pixel; image point at the top-left corner
+  var minScale = 1;
+  var pending = false;
+
+  function resize() {
+    canvas.width = Math.max(1, Math.round(container.clientWidth * ratio));
+    canvas.height = Math.max(1, Math.round(container.clientHeight * ratio));
+  }
+
+  function fit() {
+    minScale = Math.min(canvas.width / image.width, canvas.height / image.height);
+    view.scale = minScale;
+    view.x = (image.width - canvas.width / minScale) / 2;
+    view.y = (image.height - canvas.height / minScale) / 2;
+    draw();
+  }
+
+  function clamp() {
+    var viewWidth = canvas.width / view.scale, viewHeight = canvas.height / view.scale;
+    view.x = viewWidth >= image.width ? (image.width - viewWidth) / 2 : Math.min(Math.max(view.x, 0), image.width - viewWidth);
+    view.y = viewHeight >= image.height ? (image.height - viewHeight) / 2 : Math.min(Math.max(view.y, 0), image.height - viewHeight);
+  }
+
+  function zoomAt(factor, screenX, screenY) {
+    var scale = Math.min(Math.max(view.scale * factor, minScale), maxPixelRatio * ratio);
+    var imageX = view.x + screenX / view.scale, imageY = view.y + screenY / view.scale;
+    view.scale = scale;
+    view.x = imageX - screenX / scale;
+    view.y = imageY - screenY / scale;
+    draw();
+  }
+
+  function tile(level, col, row) {
+    var key = level + "/" + col + "_" + row;
+    if (!tiles[key]) {
+      var img = new Image();
+      img.onload = draw;
+      img.src = baseUrl + key + "." + image.format;
+      tiles[key] = img;
+    }
+    return tiles[key];
+  }
+
+  function drawLevel(level, load) {
+    var levelScale = Math.pow(2, level - image.maxLevel);  // Level pixels per full-resolution pixel
+    var levelWidth = Math.ceil(image.width * levelScale), levelHeight = Math.ceil(image.height * levelScale);
+    var size = image.tileSize;
+    var left = Math.max(0, Math.floor(view.x * levelScale / size));
+    var top = Math.max(0, Math.floor(view.y * levelScale / size));
+    var right = Math.min(Math.ceil(levelWidth / size), Math.ceil((view.x + canvas.width / view.scale) * levelScale / size));
+    var bottom = Math.min(Math.ceil(levelHeight / size), Math.ceil((view.y + canvas.height / view.scale) * levelScale / size));
+    var complete = true;
+    for (var col = left; col < right; col++) {
+      for (var row = top; row < bottom; row++) {
+        var key = level + "/" + col + "_" + row;
+        var img = load ? tile(level, col, row) : tiles[key];
+        if (!img || !img.complete || !img.naturalWidth) {
+          complete = false;
+          continue;
+        }
+        // Tiles after the first row/column start TILE_OVERLAP pixels early
+        var x = (col * size - (col ? image.overlap : 0)) / levelScale;
+        var y = (row * size - (row ? image.overlap : 0)) / levelScale;
+        context.drawImage(img, (x - view.x) * view.scale, (y - view.y) * view.scale,
+                          img.naturalWidth / levelScale * view.scale, img.naturalHeight / levelScale * view.scale);
+      }
+    }
+    return complete;
+  }
+
+  function render() {
+    pending = false;
+    clamp();
+    context.fillStyle = "#000";
+    context.fillRect(0, 0, canvas.width, canvas.height);
+    var target = Math.min(image.maxLevel, Math.max(0, image.maxLevel + Math.ceil(Math.log2(view.scale))));
+    // Coarser levels already loaded fill in while the target level's tiles arrive
+    for (var level = Math.max(0, target - 4); level < target; level++) {
+      drawLevel(level, false);
+    }
+    drawLevel(target, true);
+  }
+
+  function draw() {
+    if (image && !pending) {
+      pending = true;
+      window.requestAnimationFrame(render);
+    }
+  }
+
+  var drag = null;
+  canvas.addEventListener("pointerdown", function (event) {
+    drag = {x: event.clientX, y: event.clientY};
+    canvas.setPointerCapture(event.pointerId);
+    canvas.style.cursor = "grabbing";
+  });
+  canvas.addEventListener("pointermove", function (event) {
+    if (!drag) return;
+    view.x -= (event.clientX - drag.x) * ratio / view.scale;
+    view.y -= (event.clientY - drag.y) * ratio / view.scale;
+    drag = {x: event.clientX, y: event.clientY};
+    draw();
+  });
+  canvas.addEventListener("pointerup", function () {
+    drag = null;
+    canvas.style.cursor = "grab";
+  });
+  canvas.addEventListener("wheel", function (event) {
+    event.preventDefault();
+    var bounds = canvas.getBoundingClientRect();
+    zoomAt(Math.pow(1.2, -event.deltaY / 100), (event.clientX - bounds.left) * ratio, (event.clientY - bounds.top) * ratio);
+  }, {passive: false});
+  canvas.addEventListener("dblclick", function (event) {
+    var bounds = canvas.getBoundingClientRect();
+    zoomAt(2, (event.clientX - bounds.left) * ratio, (event.clientY - bounds.top) * ratio);
+  });
+
+  var controls = document.createElement("div");
+  controls.style.cssText = "position:absolute;top:8px;left:8px;display:flex;gap:4px;";
+  [["+", function () { zoomAt(1.5, canvas.width / 2, canvas.height / 2); }],
+   ["−", function () { zoomAt(1 / 1.5, canvas.width / 2, canvas.height / 2); }],
+   ["⌂", function () { fit(); }]].forEach(function (control) {
+    var button = document.createElement("button");
+    button.textContent = control[0];
+    button.style.cssText = "width:28px;height:28px;font-size:16px;cursor:pointer;";
+    button.addEventListener("click", control[1]);
+    controls.appendChild(button);
+  });
+  container.style.position = "relative";
+  container.appendChild(controls);
+
+  window.addEventListener("resize", function () {
+    if (image) {
+      resize();
+      fit();
+    }
+  });
+
+  fetch(dziUrl).then(function (response) {
+    if (!response.ok) throw new Error(response.status + " " + dziUrl);
+    return response.text();
+  }).then(function (text) {
+    var xml = new DOMParser().parseFromString(text, "application/xml");
+    var root = xml.getElementsByTagName("Image")[0], size = xml.getElementsByTagName("Size")[0];
+    var width = parseInt(size.getAttribute("Width"), 10), height = parseInt(size.getAttribute("Height"), 10);
+    image = {
+      width: width,
+      height: height,
+      tileSize: parseInt(root.getAttribute("TileSize"), 10),
+      overlap: parseInt(root.getAttribute("Overlap"), 10),
+      format: root.getAttribute("Format"),
+      maxLevel: Math.ceil(Math.log2(Math.max(width, height, 1))),
+    };
+    resize();
+    fit();
+  }).catch(function (error) {
+    container.textContent = "The zoomable image could not be loaded (" + error.message + ").";
+    container.style.color = "#fff";
+  });
+}
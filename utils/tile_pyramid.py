@@ -0,0 +1,110 @@
+# utils/tile_pyramid.py
+
+import os
+import math
+import shutil
+import logging
+import threading
+from utils.media_cache import MEDIA_CACHE_DIR, content_hash
+
+logger = logging.getLogger(__name__)
+
+TILE_DIR = os.path.join(MEDIA_CACHE_DIR, "tiles")  # One directory per image, named by content hash
+TILE_SIZE = 256
+TILE_OVERLAP = 1  # Pixels shared with neighbouring tiles, hides seams while zooming
+TILE_QUALITY = 85
+DZI_NAME = "image.dzi"  # Deep Zoom descriptor; tiles live in image_files/<level>/<col>_<row>.<ext>
+
+_build_lock = threading.Lock()
+
+def pyramid_key(path):
+    return content_hash(path)[:16]
+
+def pyramid_dir(path):
+    return os.path.join(TILE_DIR, pyramid_key(path))
+
+def _tile_format():
+    from PIL import features
+
+    return ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+
+def level_count(width, height):
+    """Levels in a Deep Zoom pyramid: level 0 is 1x1, the last is full resolution."""
+    return math.ceil(math.log2(max(width, height, 1))) + 1
+
+def _write_tiles(image, level_dir, out_format, suffix):
+    os.makedirs(level_dir, exist_ok=True)
+    for col in range(math.ceil(image.width / TILE_SIZE)):
+        for row in range(math.ceil(image.height / TILE_SIZE)):
+            left = max(0, col * TILE_SIZE - TILE_OVERLAP)
+            top = max(0, row * TILE_SIZE - TILE_OVERLAP)
+            right = min(image.width, (col + 1) * TILE_SIZE + TILE_OVERLAP)
+            bottom = min(image.height, (row + 1) * TILE_SIZE + TILE_OVERLAP)
+            image.crop((left, top, right, bottom)).save(
+                os.path.join(level_dir, f"{col}_{row}.{suffix}"), out_format, quality=TILE_QUALITY
+            )
+
+def build_pyramid(path):
+    """Tile an image into a Deep Zoom pyramid under TILE_DIR. Returns the pyramid directory.
+
+    Each level is half the size of the next one, down to 1x1, and is cut into TILE_SIZE tiles.
+    The pyramid is built in a temporary directory and renamed into place, so viewers never see
+    a half-written one; existing pyramids are left alone.
+    """
+    from PIL import Image
+
+    target = pyramid_dir(path)
+    if os.path.exists(os.path.join(target, DZI_NAME)):
+        return target
+
+    out_format, suffix = _tile_format()
+    tmp_dir = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    with Image.open(path) as original:
+        image = original.convert("RGBA" if out_format == "WEBP" else "RGB")
+    width, height = image.size
+    levels = level_count(width, height)
+
+    # Work down from full resolution, halving the previous level each time
+    for level in reversed(range(levels)):
+        scale = 2 ** (levels - 1 - level)
+        size = (max(1, math.ceil(width / scale)), max(1, math.ceil(height / scale)))
+        if image.size != size:
+            image = image.resize(size, Image.LANCZOS)
+        _write_tiles(image, os.path.join(tmp_dir, "image_files", str(level)), out_format, suffix)
+
+    with open(os.path.join(tmp_dir, DZI_NAME), 'w') as file:
+        file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" TileSize="{TILE_SIZE}" '
+            f'Overlap="{TILE_OVERLAP}" Format="{suffix}"><Size Width="{width}" Height="{height}"/></Image>\n'
+        )
+
+    try:
+        os.rename(tmp_dir, target)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)  # Another worker finished the same pyramid first
+    return target
+
+def ensure_pyramid(path):
+    """Return the pyramid directory for path, building it on first use, or None if that fails."""
+    if os.path.exists(os.path.join(pyramid_dir(path), DZI_NAME)):
+        return pyramid_dir(path)
+    try:
+        with _build_lock:
+            return build_pyramid(path)
+    except Exception as e:
+        logger.warning(f"Could not build tiles for {path}: {e}")
+        return None
+
+if __name__ == "__main__":
+    # Tile every result image ahead of time, e.g. as a deploy step: python -m utils.tile_pyramid
+    from utils.case_bundle import get_case_bundle
+    from utils.media_manifest import get_media_manifest, media_name
+
+    manifest = get_media_manifest()
+    for result in get_case_bundle().results:
+        asset = manifest.get(media_name(result), "image")
+        if asset:
+            print(f"{result}: {build_pyramid(asset.path)}")
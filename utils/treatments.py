@@ -1,16 +1,10 @@
 import streamlit as st
 from utils.session_management import collect_session_data  #######NEED THIS
+from utils.diagnosis_sidebar import diagnosis_sidebar
+from utils.matrix_assessment import matrix_assessment, encode_matrix
 from utils.firebase_operations import upload_to_firebase  
 
-# Function to read diagnoses from a file
-def read_diagnoses_from_file():
-    try:
-        with open('dx_list.txt', 'r') as file:
-            diagnoses = [line.strip() for line in file.readlines() if line.strip()]
-        return diagnoses
-    except Exception as e:
-        st.error(f"Error reading dx_list.txt: {e}")
-        return []
+ASSESSMENT_OPTIONS = ["", "Useful", "Neither More Nor Less Useful", "Not Useful"]
 
 def display_treatments(db, document_id):
     # Initialize session state
@@ -18,104 +12,33 @@ def display_treatments(db, document_id):
         st.session_state.current_page = "treatments"
     if 'diagnoses' not in st.session_state:
         st.session_state.diagnoses = [""] * 5
-    if 'treatments' not in st.session_state:
-        st.session_state.treatments = [""] * 5
     if 'diagnoses_s7' not in st.session_state:  # Changed from diagnoses_s5 to diagnoses_s7
         st.session_state.diagnoses_s7 = [""] * 5
     if 'selected_moving_diagnosis' not in st.session_state:
         st.session_state.selected_moving_diagnosis = ""  
 
-    # Load diagnoses from file
-    dx_options = read_diagnoses_from_file()
-    dx_options.insert(0, "")  
-
     st.title("Treatments")
 
     st.markdown("""Please provide up to 5 treatments and describe how they impact the diagnoses you have selected.""")
 
-    # Reorder section in the sidebar
-    with st.sidebar:
-        st.subheader("Reorder Diagnoses")
-
-        selected_diagnosis = st.selectbox(
-            "Select a diagnosis to move",
-            options=st.session_state.diagnoses,
-            index=st.session_state.diagnoses.index(st.session_state.selected_moving_diagnosis) if st.session_state.selected_moving_diagnosis in st.session_state.diagnoses else 0,
-            key="move_diagnosis"
-        )
-
-        move_direction = st.radio("Adjust Priority:", options=["Higher Priority", "Lower Priority"], key="move_direction")
-
-        if st.button("Adjust Priority"):
-            idx = st.session_state.diagnoses.index(selected_diagnosis)
-            if move_direction == "Higher Priority" and idx > 0:
-                st.session_state.diagnoses[idx], st.session_state.diagnoses[idx - 1] = (
-                    st.session_state.diagnoses[idx - 1], st.session_state.diagnoses[idx]
-                )
-                st.session_state.selected_moving_diagnosis = st.session_state.diagnoses[idx - 1]  
-            elif move_direction == "Lower Priority" and idx < len(st.session_state.diagnoses) - 1:
-                st.session_state.diagnoses[idx], st.session_state.diagnoses[idx + 1] = (
-                    st.session_state.diagnoses[idx + 1], st.session_state.diagnoses[idx]
-                )
-                st.session_state.selected_moving_diagnosis = st.session_state.diagnoses[idx + 1]  
-
-        # Change a diagnosis section
-        st.subheader("Change a Diagnosis")
-        change_diagnosis = st.selectbox(
-            "Select a diagnosis to change",
-            options=st.session_state.diagnoses,
-            key="change_diagnosis"
-        )
-
-        new_diagnosis_search = st.text_input("Search for a new diagnosis", "")
-        if new_diagnosis_search:
-            new_filtered_options = [dx for dx in dx_options if new_diagnosis_search.lower() in dx.lower() and dx not in st.session_state.diagnoses]
-            if new_filtered_options:
-                st.write("**Available Options:**")
-                for option in new_filtered_options:
-                    if st.button(f"{option}", key=f"select_new_{option}"):
-                        index_to_change = st.session_state.diagnoses.index(change_diagnosis)
-                        st.session_state.diagnoses[index_to_change] = option
-                        st.rerun()  
-
-    # Display treatments
-    cols = st.columns(len(st.session_state.diagnoses) + 1)
-    with cols[0]:
-        st.markdown("")
-    for diagnosis, col in zip(st.session_state.diagnoses, cols[1:]):
-        with col:
-            st.markdown(diagnosis)
-
-    for i in range(5):
-        cols = st.columns(len(st.session_state.diagnoses) + 1)
-        with cols[0]:
-            st.session_state.treatments[i] = st.text_input(f"", key=f"treatment_row_{i}", label_visibility="collapsed")
+    # Reorder and change diagnoses in the sidebar
+    diagnosis_sidebar()
 
-        for diagnosis, col in zip(st.session_state.diagnoses, cols[1:]):
-            with col:
-                st.selectbox(
-                    "Assessment for " + diagnosis,
-                    options=["", "Useful", "Neither More Nor Less Useful", "Not Useful"],
-                    key=f"select_{i}_{diagnosis}_treatment",
-                    label_visibility="collapsed"
-                )
+    # Display treatments as one editable table
+    matrix = matrix_assessment(
+        "treatments",
+        "Treatments",
+        st.session_state.diagnoses,
+        ASSESSMENT_OPTIONS,
+    )
 
     # Submit button for treatments
     if st.button("Submit",key="treatments_submit_button"):
         # Ensure at least one treatment is provided
-        if not any(st.session_state.treatments):
+        if not any(matrix["rows"]):
             st.error("Please enter at least one treatment.")
         else:
-            assessments = {}
-            for i in range(5):
-                for diagnosis in st.session_state.diagnoses:
-                    assessment = st.session_state[f"select_{i}_{diagnosis}_treatment"]
-                    if diagnosis not in assessments:
-                        assessments[diagnosis] = []
-                    assessments[diagnosis].append({
-                        'treatment': st.session_state.treatments[i],
-                        'assessment': assessment
-                    })
+            assessments = encode_matrix(matrix, st.session_state.diagnoses, ASSESSMENT_OPTIONS)
             
             # Update diagnoses_s7 to the current state of diagnoses
             st.session_state.diagnoses_s7 = [dx for dx in st.session_state.diagnoses if dx]
@@ -127,7 +50,7 @@ def display_treatments(db, document_id):
 
             # Upload to Firebase using the current diagnosis order
             #upload_message = upload_to_firebase(db, 'your_collection_name', document_id, entry)
-            upload_message = upload_to_firebase(db, document_id, entry)
+            upload_message = upload_to_firebase(db, document_id, entry, replace=['assessments'])
             
             st.session_state.page = "Simple Success"  # Change to the Simple Success page
             st.success("Treatments submitted successfully.")
@@ -1,4 +1,5 @@
 import streamlit as st
+from utils.page_registry import advance
 
 def welcome_page():
     st.markdown("<h3 style='font-family: \"DejaVu Sans\";'>Welcome to the Pediatric Clerkship Assessment!</h3>", unsafe_allow_html=True)
@@ -7,5 +8,5 @@ def welcome_page():
     st.markdown("<p style='font-family: \"DejaVu Sans\";'>1. Please enter your unique code on the next page.<br>2. Follow the prompts to complete the assessment.</p>", unsafe_allow_html=True)
 
     if st.button("Next",key="welcome_next_button"):
-        st.session_state.page = "login"  # Change to login page
+        advance("welcome")  # Next page in the flow
         st.rerun()  # Rerun to refresh the view
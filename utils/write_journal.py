@@ -0,0 +1,127 @@
+# utils/write_journal.py
+
+import os
+import json
+import time
+import uuid
+import fcntl
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Where queued writes are recorded until Firestore has them. Set to "" to keep them in memory only.
+WRITE_JOURNAL = os.getenv("WRITE_JOURNAL", ".write_journal.db")
+
+def new_key():
+    """Idempotency key for one journaled write."""
+    return uuid.uuid4().hex
+
+class WriteJournal:
+    """Append-only record of writes that have been queued but not yet committed.
+
+    Every entry is stored under its idempotency key before the background writer sees it, and
+    removed once its batch is committed. Rows belong to the journal instance that wrote them,
+    identified by a random owner token rather than the PID, which a restarted container often
+    gets again. The owner holds an exclusive lock on <path>.owners/<owner>.lock for as long as
+    the process lives, so a process that starts after a crash can tell which owners are gone,
+    adopt their rows and send them again. Replaying is safe because document writes are merges
+    and events are keyed by seq.
+    """
+
+    def __init__(self, path=WRITE_JOURNAL):
+        self.path = path
+        self.owner = str(uuid.uuid4())
+        self._owners_dir = f"{path}.owners"
+        os.makedirs(self._owners_dir, exist_ok=True)
+        self._owner_file = open(self._owner_lock_path(self.owner), 'w')  # Held until the process exits
+        fcntl.flock(self._owner_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # WAL keeps committed rows across a process crash
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS writes ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, idempotency_key TEXT NOT NULL UNIQUE, owner TEXT NOT NULL, "
+            "collection_name TEXT NOT NULL, document_id TEXT NOT NULL, log_name TEXT, data TEXT NOT NULL, "
+            "created_at REAL NOT NULL, replace_fields TEXT)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(writes)")]
+        if "replace_fields" not in columns:  # Journals written before fields could be replaced
+            self._conn.execute("ALTER TABLE writes ADD COLUMN replace_fields TEXT")
+        self._conn.commit()
+
+    def _owner_lock_path(self, owner):
+        return os.path.join(self._owners_dir, f"{owner}.lock")
+
+    def _owner_alive(self, owner):
+        """True while the process that opened the journal as owner still holds its lock.
+
+        The lock file of an owner that is gone is removed. Owners without one (such as the PIDs
+        written by older versions) count as gone.
+        """
+        path = self._owner_lock_path(owner)
+        try:
+            file = open(path)
+        except OSError:
+            return False
+        with file:
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            os.remove(path)
+            return False
+
+    def record(self, key, collection_name, document_id, data, log_name=None, replace=()):
+        """Store one write. log_name is set for events and None for document entries.
+
+        replace lists the entry's fields that overwrite rather than merge (see DocumentStore.set_many).
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO writes (idempotency_key, owner, collection_name, document_id, log_name, data, created_at, replace_fields) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, self.owner, collection_name, document_id, log_name, json.dumps(data), time.time(), json.dumps(list(replace))),
+            )
+
+    def discard(self, keys):
+        """Forget writes that are now in Firestore."""
+        keys = list(keys)
+        if not keys:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM writes WHERE idempotency_key = ?", [(key,) for key in keys])
+
+    def adopt_orphans(self):
+        """Take over rows left by processes that have exited. Returns them oldest first.
+
+        Each row is (key, collection_name, document_id, log_name, data, replace). Lock files of
+        processes that exited without leaving rows are cleaned up on the way.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")  # Two processes starting together must not adopt the same rows
+            owners = {owner for (owner,) in self._conn.execute("SELECT DISTINCT owner FROM writes")}
+            owners.update(name[:-len(".lock")] for name in os.listdir(self._owners_dir) if name.endswith(".lock"))
+            owners.discard(self.owner)
+            orphaned = [owner for owner in owners if not self._owner_alive(owner)]
+            rows = []
+            for owner in orphaned:
+                rows += self._conn.execute(
+                    "SELECT id, idempotency_key, collection_name, document_id, log_name, data, replace_fields FROM writes WHERE owner = ?",
+                    (owner,),
+                ).fetchall()
+                self._conn.execute("UPDATE writes SET owner = ? WHERE owner = ?", (self.owner, owner))
+        return [(key, collection_name, document_id, log_name, json.loads(data), json.loads(replace or "[]"))
+                for _, key, collection_name, document_id, log_name, data, replace in sorted(rows)]
+
+    def close(self):
+        """Stop owning the journal. Rows still in it are adopted by the next process that opens it."""
+        with self._lock:
+            self._conn.close()
+            self._owner_file.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
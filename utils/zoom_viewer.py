@@ -0,0 +1,40 @@
+# utils/zoom_viewer.py
+
+import os
+import json
+import functools
+import streamlit as st
+import streamlit.components.v1 as components
+from utils.media_server import media_server_available, tiles_url
+from utils.tile_pyramid import ensure_pyramid, pyramid_key
+
+VIEWER_SCRIPT = os.path.join(os.path.dirname(__file__), "static", "deepzoom.js")
+VIEWER_HEIGHT = 520
+
+_VIEWER_HTML = """
+<div id="viewer" style="width: 100%; height: {height}px; background: #000;"></div>
+<script>{script}</script>
+<script>
+  DeepZoomViewer(document.getElementById("viewer"), {tile_source}, {{maxPixelRatio: 2}});
+</script>
+"""
+
+@functools.lru_cache(maxsize=1)
+def _viewer_script():
+    with open(VIEWER_SCRIPT) as file:
+        return file.read()
+
+def zoom_viewer(path, height=VIEWER_HEIGHT):
+    """Show an image in a pan/zoom viewer that only downloads the tiles in view.
+
+    Tiles come from the media server, so the viewer is only used when the browser can reach it
+    (see media_server_available). Returns False otherwise, or if the image could not be tiled,
+    so the caller can fall back to st.image.
+    """
+    if not media_server_available(st.context.url) or ensure_pyramid(path) is None:
+        return False
+    components.html(
+        _VIEWER_HTML.format(height=height, script=_viewer_script(), tile_source=json.dumps(tiles_url(pyramid_key(path)))),
+        height=height + 10,
+    )
+    return True